@@ -0,0 +1,252 @@
+import csv
+import glob
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Iterator
+from bayes_parser import BayesParser
+from cache import GameCache
+from loader import ARCHIVE_SUFFIXES, event_number
+from results_models import TeamResults
+from results_store import ResultsStore
+
+ROW_KEYS = ["game_urn", "team_urn", "start_time", "source"]
+COLUMNS = ROW_KEYS + list(TeamResults.model_fields)
+
+
+def is_game_folder(path: Path) -> bool:
+    with os.scandir(path) as it:
+        return any(event_number(e.name) is not None for e in it)
+
+
+def is_game(path: Path) -> bool:
+    if path.is_dir():
+        return is_game_folder(path)
+    return path.is_file() and path.name.endswith(ARCHIVE_SUFFIXES)
+
+
+def find_games(pattern: str) -> list[Path]:
+    """Game sources matching pattern.
+
+    Args:
+        pattern (str): A game folder, a root folder whose children are game folders or bundles,
+        or a glob of game folders / bundles (e.g. "dumps/2024-*/*").
+
+    Returns:
+        list[Path]: Sorted game sources.
+    """
+    path = Path(pattern)
+    if path.is_dir():
+        if is_game_folder(path):
+            return [path]
+        return sorted(p for p in path.iterdir() if is_game(p))
+    return sorted(p for p in map(Path, glob.glob(pattern)) if is_game(p))
+
+
+def worker_parser(
+    source: Path,
+    cache_dir: Path | None = None,
+    cache_bytes: int | None = None,
+    strict: bool = True,
+) -> BayesParser:
+    """Parser of a game in a worker process of a pool (batches, server), with the disk cache at cache_dir if given."""
+    cache = GameCache(cache_dir, max_bytes=cache_bytes) if cache_dir is not None else None
+    # Games are already parsed in parallel, load files serially, and stream them so that
+    # the raw events of a game are not all in memory at once
+    return BayesParser(source, workers=1, cache=cache, strict=strict, streaming=True)
+
+
+def parse_game(
+    source: Path,
+    cache_dir: Path | None = None,
+    cache_bytes: int | None = None,
+    strict: bool = True,
+) -> list[dict]:
+    """Parse a game and returns one row of TeamResults per team, keyed by game urn and team urn."""
+    bp = worker_parser(source, cache_dir, cache_bytes, strict)
+    return [
+        {
+            "game_urn": bp.urn,
+            "team_urn": team_urn,
+            "start_time": bp.start_time,
+            "source": str(source),
+            **results.model_dump(),
+        }
+        for team_urn, results in bp.get_teams_stats().items()
+    ]
+
+
+class ResultsWriter:
+    """Streams result rows into a .csv or .parquet (needs pyarrow) table."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        if path.suffix == ".parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            types = {bool: pa.bool_(), int: pa.int64(), float: pa.float64()}
+            self._schema = pa.schema(
+                [(key, pa.string()) for key in ROW_KEYS] +
+                [(name, types[field.annotation]) for name, field in TeamResults.model_fields.items()]
+            )
+            self._file = None
+            self._writer = pq.ParquetWriter(path, self._schema)
+        elif path.suffix == ".csv":
+            self._file = open(path, "w", newline="")
+            self._writer = csv.DictWriter(self._file, fieldnames=COLUMNS)
+            self._writer.writeheader()
+        else:
+            raise ValueError(f"Unsupported output {path}, expected a .csv or .parquet file")
+
+    def write(self, rows: list[dict]) -> None:
+        if self._file is None:
+            import pyarrow as pa
+            self._writer.write_table(pa.Table.from_pylist(rows, schema=self._schema))
+        else:
+            self._writer.writerows(rows)
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is None:
+            self._writer.close()
+        else:
+            self._file.close()
+
+    def __enter__(self) -> "ResultsWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class BatchReport:
+
+    def __init__(self, total: int) -> None:
+        self.total = total
+        self.succeeded = 0
+        self.rows = 0
+        self.failures: dict[Path, str] = dict()
+        self.start = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def summary(self) -> str:
+        done = self.succeeded + len(self.failures)
+        lines = [
+            f"{done}/{self.total} games in {self.elapsed:.1f}s ({done / max(self.elapsed, 1e-9):.2f} games/s), "
+            f"{self.succeeded} parsed, {len(self.failures)} failed, {self.rows} rows written"
+        ]
+        lines += [f"FAILED {source}: {error}" for source, error in self.failures.items()]
+        return "\n".join(lines)
+
+
+def _error(e: Exception) -> str:
+    if isinstance(e, BrokenProcessPool):
+        return "Worker process died (killed, or out of memory)"
+    return "".join(traceback.format_exception_only(e)).strip()
+
+
+def _parse_isolated(source: Path, **kwargs) -> tuple[list[dict] | None, str | None]:
+    """Parse a game in its own process, so that a worker dying only fails this game."""
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        try:
+            return pool.submit(parse_game, source, **kwargs).result(), None
+        except Exception as e:
+            return None, _error(e)
+
+
+def _iter_results(sources: list[Path], processes: int, **kwargs) -> Iterator[tuple[Path, list[dict] | None, str | None]]:
+    """Parse games in a process pool, keeping at most 2 games per process in flight
+    so that finished results don't pile up in memory.
+
+    A worker killed (e.g. out of memory) breaks the whole pool : the pool is rebuilt, and the games that were
+    in flight are parsed again at the end, one by one in their own process, to fail only the one that killed it.
+    """
+    pending = iter(sources)
+    suspects: list[Path] = []
+    pool = ProcessPoolExecutor(max_workers=processes)
+    in_flight = dict()
+    try:
+        while True:
+            broken = False
+            while len(in_flight) < 2 * processes and (source := next(pending, None)) is not None:
+                try:
+                    in_flight[pool.submit(parse_game, source, **kwargs)] = source
+                except BrokenProcessPool:
+                    suspects.append(source)
+                    broken = True
+                    break
+            if not in_flight and not broken:
+                break
+            if not broken:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    source = in_flight.pop(future)
+                    try:
+                        yield source, future.result(), None
+                    except BrokenProcessPool:
+                        broken = True
+                        suspects.append(source)
+                    except Exception as e:
+                        # Failing asserts of a single game must not stop the batch
+                        yield source, None, _error(e)
+            if broken:
+                suspects += in_flight.values()
+                in_flight.clear()
+                pool.shutdown(cancel_futures=True)
+                pool = ProcessPoolExecutor(max_workers=processes)
+    finally:
+        pool.shutdown(cancel_futures=True)
+    for source in suspects:
+        yield source, *_parse_isolated(source, **kwargs)
+
+
+def run_batch(
+    sources: list[Path],
+    output: Path,
+    processes: int | None = None,
+    cache: GameCache | None = None,
+    strict: bool = True,
+    store: ResultsStore | None = None,
+    verbose: bool = True,
+) -> BatchReport:
+    """Parse games in a process pool and stream their TeamResults rows into output.
+
+    Args:
+        sources (list[Path]): Game folders or bundles.
+        output (Path): .csv or .parquet table to write.
+        processes (int, optional): Size of the process pool. Defaults to the CPU count.
+        cache (GameCache, optional): Cache of parsed games shared by workers. Defaults to None.
+        strict (bool, optional): Validate every frame, see BayesParser. Defaults to True.
+        store (ResultsStore, optional): Results store the rows are also added to, saved at the end. Defaults to None.
+        verbose (bool, optional): Print progress on stderr. Defaults to True.
+
+    Returns:
+        BatchReport: Counts, failures and throughput of the batch.
+    """
+    processes = processes or os.cpu_count() or 1
+    kwargs = dict(cache_dir=cache.directory, cache_bytes=cache.max_bytes) if cache is not None else dict()
+    kwargs["strict"] = strict
+    report = BatchReport(len(sources))
+    with ResultsWriter(output) as writer:
+        for source, rows, error in _iter_results(sources, processes, **kwargs):
+            if error is None:
+                writer.write(rows)
+                if store is not None:
+                    store.add_rows(rows)
+                report.succeeded += 1
+                report.rows += len(rows)
+            else:
+                report.failures[source] = error
+            if verbose:
+                done = report.succeeded + len(report.failures)
+                print(f"[{done}/{report.total}] {'ok' if error is None else 'FAILED'} {source}", file=sys.stderr)
+    if store is not None:
+        store.save()
+    return report
@@ -1,20 +1,75 @@
 import argparse
 from pathlib import Path
+from batch import find_games, run_batch
 from bayes_parser import BayesParser
+from cache import DEFAULT_CACHE_DIR, GameCache
+from live import LiveGame
+from profiling import Profiler
+from results_store import ResultsStore
 
 
 def parse_arguments():
     parser = argparse.ArgumentParser()
-    parser.add_argument("-p", "--path", type=str, help="Bayes folder path to load", required=True)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("-p", "--path", type=str, help="Bayes folder (or .zip, .tar.gz, .jsonl bundle) path to load")
+    source.add_argument("-b", "--batch", type=str, help="Root folder or glob of Bayes folders to parse in batch")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Number of workers used to load event files")
+    parser.add_argument("-j", "--processes", type=int, default=None, help="Number of games parsed in parallel in batch mode")
+    parser.add_argument("-o", "--output", type=str, default="results.csv", help="Batch mode .csv or .parquet output table")
+    parser.add_argument("--cache", action="store_true", help="Cache parsed games, and reuse them when the folder did not change")
+    parser.add_argument("--cache-dir", type=str, default=str(DEFAULT_CACHE_DIR), help="Directory of the parsed games cache")
+    parser.add_argument("--cache-size", type=int, default=2048, help="Maximum size of the cache in MB")
+    parser.add_argument("-f", "--follow", action="store_true", help="Follow a live game folder, print results as event files land")
+    parser.add_argument("--idle-timeout", type=float, default=None, help="Stop following after this many seconds without new event files")
+    parser.add_argument("-s", "--store", type=str, default=None, help="Results store (.npz) the teams results are added to")
+    parser.add_argument("--profile", action="store_true", help="Print time and memory of each parsing stage (single game)")
+    parser.add_argument("--profile-memory", action="store_true", help="Also track peak memory of each stage, which slows parsing down")
+    parser.add_argument("--profile-output", type=str, default=None, help="Write the profile to a .json file, or a cProfile dump (.prof)")
+    parser.add_argument("--stream", action="store_true", help="Parse events as they are read, without keeping them all in memory")
+    parser.add_argument("--fast", action="store_true", help="Skip validation of most frames (trusted mode, see trusted.py)")
     return parser.parse_args()
 
 
 if __name__ == "__main__":
     args = parse_arguments()
-    
-    path = Path(args.path)
-    if not path.exists():
-        raise FileNotFoundError(f"{path}")
-    
-    bp = BayesParser(path)
-    print(bp.get_teams_stats())
+
+    cache = GameCache(Path(args.cache_dir), max_bytes=args.cache_size * 1024 ** 2) if args.cache else None
+    store = ResultsStore(Path(args.store)) if args.store else None
+
+    if args.batch:
+        games = find_games(args.batch)
+        if len(games) == 0:
+            raise FileNotFoundError(f"No game found in {args.batch}")
+        report = run_batch(games, Path(args.output), processes=args.processes, cache=cache, strict=not args.fast, store=store)
+        print(report.summary())
+    else:
+        path = Path(args.path)
+        if not path.exists():
+            raise FileNotFoundError(f"{path}")
+
+        if args.follow:
+            live = LiveGame(path, strict=not args.fast)
+            for results in live.follow(idle_timeout=args.idle_timeout):
+                print(f"[{live.parser.last_stats_time}s] {results}", flush=True)
+        else:
+            profiler = None
+            if args.profile or args.profile_memory or args.profile_output:
+                cprofile = args.profile_output is not None and not args.profile_output.endswith(".json")
+                profiler = Profiler(trace_memory=args.profile_memory, cprofile=cprofile)
+            bp = BayesParser(
+                path, workers=args.workers, cache=cache, strict=not args.fast, profiler=profiler, streaming=args.stream
+            )
+            stats = bp.get_teams_stats()
+            print(stats)
+            if store is not None:
+                for team_urn, results in stats.items():
+                    store.add(bp.urn, team_urn, bp.start_time, results)
+                store.save()
+
+            if profiler is not None:
+                profiler.close()
+                print(profiler.table())
+                if args.profile_output is not None and args.profile_output.endswith(".json"):
+                    profiler.save_json(Path(args.profile_output))
+                elif args.profile_output is not None:
+                    profiler.dump_cprofile(Path(args.profile_output))
@@ -1,5 +1,6 @@
 from typing import Literal
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+from timeline import FrameTimeline
 
 
 class Position(BaseModel):
@@ -135,4 +136,11 @@ class Game(BaseModel):
     start_time: str | None = None
     teams: list[Team] | None = None
 
-    frames: list[Frame] = Field(default=list())
\ No newline at end of file
+    frames: list[Frame] = Field(default=list())
+
+    _timeline: FrameTimeline = PrivateAttr(default_factory=FrameTimeline)
+
+    @property
+    def timeline(self) -> FrameTimeline:
+        """Game time index of frames, frames appended since the last access are indexed on the fly."""
+        return self._timeline.sync(self.frames)
@@ -1,67 +1,210 @@
-from enum import Enum
-import io
-import json
+import heapq
+import zipfile
+import zlib
+from functools import cached_property
+import numpy as np
 import plotly.express as px
-import pandas as pd
 from PIL import Image
 from pathlib import Path
+from typing import Iterable
 from bayes_models import Frame, Game, PlayerFrame, Position, Team, TeamFrame
-from results_models import TeamResults
-from utils import get_first_frame_at_time, get_first_team_objective
+from cache import FRAME_ACTIONS, CachedGame, GameCache
+from columnar import ColumnarGame
+from event_store import Action, EventStore, game_time
+from loader import EventLoader
+from metrics import DEFAULT_METRICS, STATS_ACTIONS, MetricRegistry
+from profiling import Profiler, profiled, stage
+from render import MAP_RANGE, MapRenderer
+from spatial import SpatialIndex
+from timeseries import GameSeries
+from trusted import build, make
+from results_models import PlayerResults, TeamResults
 
 """
 IDEAS :
-- Gold curves
 - Baron efficienty (+ gold, towers, inhibs, drakes, kills, ...)
 """
 
-
-class Action(Enum):
-    KILLED_WARD = 'KILLED_WARD'
-    UPDATE = 'UPDATE'
-    UNDO_ITEM = 'UNDO_ITEM'
-    KILLED_ANCIENT = 'KILLED_ANCIENT'  # Ancient = all camps + krug + baron + rift + dragon
-    CONSUMED_ITEM = 'CONSUMED_ITEM'
-    PLACED_WARD = 'PLACED_WARD'
-    EXPIRED_OBJECTIVE = 'EXPIRED_OBJECTIVE'  # TODO: Verify what this means (herald not used ? Baron buff finished ?)
-    SOLD_ITEM = 'SOLD_ITEM'
-    START_MAP = 'START_MAP'
-    KILL = 'KILL'
-    SPAWNED_ANCIENT = 'SPAWNED_ANCIENT'  # TODO: Verify what ancient means
-    SELECTED_HERO = 'SELECTED_HERO'
-    TOOK_OBJECTIVE = 'TOOK_OBJECTIVE'  # TODO: Verify what objective means (turret, inib, drake, baron, herald ?)
-    SPECIAL_KILL = 'SPECIAL_KILL'  # TODO: Check what special stands for
-    BANNED_HERO = 'BANNED_HERO'
-    END_PAUSE = 'END_PAUSE'
-    PURCHASED_ITEM = 'PURCHASED_ITEM'
-    UPDATE_SCORE = 'UPDATE_SCORE'  # TODO: Verify what this is
-    DIED = 'DIED'
-    PICKED_UP_ITEM = 'PICKED_UP_ITEM'
-    ANNOUNCE = 'ANNOUNCE'
-    SPAWNED = 'SPAWNED'
-    UPDATE_POSITIONS = 'UPDATE_POSITIONS'
-    LEVEL_UP = 'LEVEL_UP'
-    ANNOUNCED_ANCIENT = 'ANNOUNCED_ANCIENT'  # TODO: Verify what ancient means
+# In trusted (strict=False) mode, one update every TRUSTED_SAMPLE_EVERY is validated
+TRUSTED_SAMPLE_EVERY = 100
+# In streaming mode, position frames are reordered by game time within a window of this many frames
+STREAM_REORDER_WINDOW = 64
 
 
 class BayesParser:
     
-    def __init__(self, directory: Path) -> None:
-        files = {f.name: f for f in directory.iterdir() if f.is_file()}
-        
-        self.data = [json.load(open(files[f"{i}".zfill(6) + ".json"], "r")) for i in range(1, len(files) - 1)]
+    def __init__(
+        self,
+        directory: Path,
+        workers: int | None = None,
+        cache: GameCache | None = None,
+        strict: bool = True,
+        profiler: Profiler | None = None,
+        streaming: bool = False,
+        keep_actions: Iterable[Action] | None = STATS_ACTIONS,
+    ) -> None:
+        """
+        Args:
+            directory (Path): Bayes folder, or a game bundle (.zip, .tar.gz, .jsonl, .jsonl.gz).
+            workers (int, optional): Number of workers used to load event files. Defaults to the CPU count.
+            cache (GameCache, optional): Cache of parsed games. If the game is cached, events are not loaded again,
+            otherwise the parsed game is added to the cache. Defaults to None.
+            strict (bool, optional): Build frames with validated pydantic models. If False, frames are built
+            as records with the same attributes, without validation (see trusted.py), which is several times faster.
+            Team frames are validated in both modes.
+            One update every TRUSTED_SAMPLE_EVERY is still validated as a schema check. Defaults to True.
+            profiler (Profiler, optional): Records time and memory of each stage (see profiling.py). Defaults to None.
+            streaming (bool, optional): Parse events in a single pass as they are read, instead of loading every
+            event first. Raw events are dropped once parsed, only the events of keep_actions are kept in self.data.
+            Peak memory is the parsed game and the kept events (a few hundred per game with STATS_ACTIONS), plus one
+            chunk of raw events (EventLoader.chunk_size files) and STREAM_REORDER_WINDOW position frames.
+            Defaults to False.
+            keep_actions (Iterable[Action], optional): Actions of the events kept by streaming parses and stored in the
+            cache, the announce is always kept. Metrics reading other actions raise a ValueError, they need them added.
+            None keeps every event not materialized in frames (cache.FRAME_ACTIONS). Defaults to STATS_ACTIONS.
+        """
+        self.strict = strict
+        self.profiler = profiler
+        self.directory = directory
+        self._cached: CachedGame | None = None
+        if cache is not None:
+            with stage(profiler, "cache_get"):
+                self._cached = cache.get(directory, actions=keep_actions)
+        if self._cached is not None:
+            # Only the events of keep_actions are cached
+            self.data = self._cached.events
+            self.events = EventStore(self.data, kept_actions=self._cached.actions)
+            self.columns = self._cached.columns
+            # Frames are decoded on first access of self.game
+            self._game = None
+            return
+
+        if streaming:
+            with stage(profiler, "stream") as stats:
+                stats.events = self._stream(EventLoader(workers=workers).iter_events(directory), keep_actions)
+        else:
+            with stage(profiler, "load") as stats:
+                data = EventLoader(workers=workers).load(directory)
+                stats.events = len(data)
+            self._parse(data)
+
+        if cache is not None:
+            with stage(profiler, "cache_put"):
+                cache.put(directory, self.game, self.events, self.columns, actions=keep_actions)
+
+    @classmethod
+    def from_events(cls, events: list[dict], strict: bool = True) -> "BayesParser":
+        """Parser of already loaded events, e.g. the first events of a live game (see live.LiveGame)."""
+        parser = cls.__new__(cls)
+        parser.directory = None
+        parser.strict = strict
+        parser.profiler = None
+        parser._cached = None
+        parser._parse(events)
+        return parser
+
+    def _parse(self, events: list[dict]) -> None:
+        self.data = events
+        # Index events by action once, stages query the index instead of scanning self.data
+        with stage(self.profiler, "index") as stats:
+            self.events = EventStore(self.data)
+            stats.events = len(self.data)
         self.game = self.init_game()
+        # Game time (s) of the last stats update applied, and updates waiting for their position frame (live games)
+        self.last_stats_time: int | None = None
+        self._stats_parsed = 0
+        self._pending_stats: list[dict] = []
 
         # Init frames with the positions (every 1sec)
         self.parse_positions()
         # Parse stats and complete frames
         self.parse_stats()
+
+    def _stream(self, events: Iterable[dict], keep_actions: Iterable[Action] | None = None) -> int:
+        """Parse events in one pass, sending each event to the frames or to the events index, then dropping it.
+        Same result as _parse, as long as position frames are not logged more than STREAM_REORDER_WINDOW frames
+        late, later frames are dropped.
+
+        Args:
+            events (Iterable[dict]): Raw events, in feed order.
+            keep_actions (Iterable[Action], optional): Actions of the events indexed, the others are dropped.
+            Defaults to None, every event not materialized in frames.
+
+        Returns:
+            int: Number of events read.
+        """
+        kept = frozenset(Action) - set(FRAME_ACTIONS) if keep_actions is None else frozenset(keep_actions) | {Action.ANNOUNCE}
+        keep = {a.value for a in kept}
+        self.data = []
+        self.events = EventStore(kept_actions=kept)
+        self._game = None
+        self.last_stats_time = None
+        self._stats_parsed = 0
+        self._pending_stats = []
+        # Heaps of (game time, arrival) ordered position frames and stats updates not parsed yet
+        positions: list[tuple[int, int, dict]] = []
+        updates: list[tuple[int, int, dict]] = []
+
+        count = 0
+        for count, event in enumerate(events, 1):
+            message = event["payload"]
+            action = message["payload"]["action"]
+            payload = message["payload"]["payload"]
+            if action == Action.UPDATE_POSITIONS.value:
+                heapq.heappush(positions, (game_time(payload), count, payload))
+            elif action == Action.UPDATE.value:
+                if "gameTime" in payload:
+                    heapq.heappush(updates, (payload["gameTime"], count, payload))
+            elif action in keep:
+                # Metadata, objectives and kills, used by the stats
+                self.data.append(event)
+                self.events.add(event)
+                if self._game is None and action == Action.ANNOUNCE.value:
+                    self.game = self.init_game()
+            if self._game is not None:
+                while len(positions) > STREAM_REORDER_WINDOW:
+                    self._stream_position(heapq.heappop(positions)[2], updates)
+
+        if self._game is None:
+            self.game = self.init_game()
+        while positions:
+            self._stream_position(heapq.heappop(positions)[2], updates)
+        while updates:
+            frame = heapq.heappop(updates)[2]
+            applied = self._apply_stats(frame)
+            assert applied, f"Could not find a position frame at or after {int(frame['gameTime'] / 1000)}s"
+        return count
+
+    def _stream_position(self, frame: dict, updates: list[tuple[int, int, dict]]) -> None:
+        """Add a position frame, then parse the stats updates that can now be matched to a frame."""
+        if self.game.frames and int(frame.get("gameTime", -1000) / 1000) < self.game.frames[-1].game_time:
+            # Logged too late to be reordered
+            return
+        self._add_position_frame(frame)
+        last_time = self.game.frames[-1].game_time
+        while updates and int(updates[0][0] / 1000) <= last_time:
+            self._apply_stats(heapq.heappop(updates)[2])
+
+    @property
+    def game(self) -> Game:
+        if self._game is None:
+            try:
+                self._game = self._cached.load_game(strict=self.strict)
+            except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile, zlib.error):
+                # Entry evicted or damaged since it was read, parse again
+                self._game = BayesParser(self.directory, strict=self.strict, streaming=True).game
+        return self._game
+
+    @game.setter
+    def game(self, game: Game) -> None:
+        self._game = game
     
+    @profiled("init_game")
     def init_game(self) -> Game:
         """ Initialize game model with basic information about game, teams and players.
         """
         # Retreive game announce
-        game_announce = [d["payload"] for d in self.data if d["payload"]["payload"]["action"] == Action.ANNOUNCE.value]
+        game_announce = self.events.messages(Action.ANNOUNCE)
         assert len(game_announce) > 0, "Could not find game announce in the loaded data."
         game_announce = game_announce[0]
         
@@ -79,118 +222,200 @@ class BayesParser:
         
         return game
     
+    @profiled("parse_positions", events=lambda self: self.events.count(Action.UPDATE_POSITIONS))
     def parse_positions(self) -> None:
         """Parse players positions. Positions are logged every second.
         This method initialize our frames models. (That's dirty).
         """
-        position_data = [d["payload"]["payload"]["payload"] for d in self.data if d["payload"]["payload"]["action"] == Action.UPDATE_POSITIONS.value]
+        position_data = self.events.payloads(Action.UPDATE_POSITIONS)
         
         for frame in position_data:
-            frame_info = Frame(game_time=int(frame.get("gameTime", -1000) / 1000))
-            for p in frame["positions"]:
-                frame_info.players.append(PlayerFrame(
-                    urn=p["playerUrn"],
-                    position=Position(x=p["position"][0], y=p["position"][1])
-                ))
-            self.game.frames.append(frame_info)
+            self._add_position_frame(frame)
+
+    def _add_position_frame(self, frame: dict) -> None:
+        if not self.strict and len(self.game.frames) % TRUSTED_SAMPLE_EVERY == 0:
+            # Schema check of the trusted mode
+            self._position_frame(frame, trusted=False)
+        self.game.frames.append(self._position_frame(frame, trusted=not self.strict))
+
+    def _position_frame(self, frame: dict, trusted: bool) -> Frame:
+        """Frame of a position update, made of models, or of records without validation if trusted."""
+        game_time = int(frame.get("gameTime", -1000) / 1000)
+        if trusted:
+            return make(Frame, game_time=game_time, players=[
+                make(PlayerFrame, urn=p["playerUrn"], position=make(Position, x=p["position"][0], y=p["position"][1]))
+                for p in frame["positions"]
+            ])
+        frame_info = Frame(game_time=game_time)
+        for p in frame["positions"]:
+            frame_info.players.append(PlayerFrame(
+                urn=p["playerUrn"],
+                position=Position(x=p["position"][0], y=p["position"][1])
+            ))
+        return frame_info
     
+    @profiled("parse_stats", events=lambda self: self._stats_parsed)
     def parse_stats(self) -> None:
         """Parse statistics from teams and players. Note that this stats are only logged every 5 seconds.
         """
         score_updates = [
-            d["payload"]["payload"]["payload"]
-            for d in self.data
-            if d["payload"]["payload"]["action"] == Action.UPDATE.value and
-            "gameTime" in d["payload"]["payload"]["payload"]  # Could do this with other field, maybe gameState set to POST_CHAMP_SELECT
+            update
+            for update in self.events.payloads(Action.UPDATE)
+            if "gameTime" in update  # Could do this with other field, maybe gameState set to POST_CHAMP_SELECT
         ]
         for frame in score_updates:
-            gt = int(frame["gameTime"] / 1000)
-            frame_update = [f for f in self.game.frames if f.game_time == gt]
-            
-            # FIXME : HACKY AS FUCK BUT PLEASE WHY WOULD YOU NOT BE CONSTANT ON GAME TIME
-            while len(frame_update) == 0 and gt < len(self.game.frames):
-                # Big chance we skipped a second on position frames
-                gt += 1
-                frame_update = [f for f in self.game.frames if f.game_time == gt]
-            frame_update = frame_update[0]
-            
-            for team in ["teamOne", "teamTwo"]:
-                frame_update.teams.append(TeamFrame(**frame[team]))
-                for player in frame[team]["players"]:
-                    player_update_idx = [i for i, p in enumerate(frame_update.players) if p.urn == player["liveDataPlayerUrn"]]
-                    assert len(player_update_idx) == 1, f"Could not find a player matching urn {player['liveDataPlayerUrn']}"
-                    player_update_idx = player_update_idx[0]
-                    del player["position"]  # Delete position as it is already set
-                    frame_update.players[player_update_idx] = PlayerFrame(**player)
-
-    def get_teams_stats(self) -> dict:
-        """Gather some team statistics
-        Can improved a lot but well it's a POC
+            applied = self._apply_stats(frame)
+            assert applied, f"Could not find a position frame at or after {int(frame['gameTime'] / 1000)}s"
+
+    def _apply_stats(self, frame: dict) -> bool:
+        """Complete the position frame of a stats update, False if it is not logged yet."""
+        timeline = self.game.timeline
+        gt = int(frame["gameTime"] / 1000)
+        # Big chance we skipped a second on position frames, take the next one
+        frame_idx = timeline.index_at_or_after(gt)
+        if frame_idx is None:
+            return False
+        frame_update = timeline.frames[frame_idx]
+        player_slots = timeline.player_slots(frame_idx)
+        # Schema check of the trusted mode
+        sample = not self.strict and self._stats_parsed % TRUSTED_SAMPLE_EVERY == 0
+
+        for team in ["teamOne", "teamTwo"]:
+            # Team frames are small, records are not faster to build than validated models
+            frame_update.teams.append(TeamFrame(**frame[team]))
+            for player in frame[team]["players"]:
+                player_update_idx = player_slots.get(player["liveDataPlayerUrn"])
+                assert player_update_idx is not None, f"Could not find a player matching urn {player['liveDataPlayerUrn']}"
+                del player["position"]  # Delete position as it is already set
+                if sample:
+                    PlayerFrame(**player)
+                frame_update.players[player_update_idx] = PlayerFrame(**player) if self.strict else build(PlayerFrame, player)
+        self._stats_parsed += 1
+        self.last_stats_time = max(gt, self.last_stats_time or 0)
+        return True
+
+    def ingest(self, events: list[dict]) -> bool:
+        """Parse events logged after the parser was built (live games). Frames are appended or patched
+        in place, instead of parsing the whole game again.
+
+        Position frames older than the last frame are dropped, frames can only be appended.
+        Stats updates logged after the last position frame wait for it.
+
+        Args:
+            events (list[dict]): New raw Bayes events.
 
         Returns:
-            pd.DataFrame: Dataframe of team statistics
+            bool: True if frames were added or completed.
+        """
+        self.data.extend(events)
+        self.events.extend(events)
+        # Columns are rebuilt on next access
+        self.__dict__.pop("columns", None)
+
+        def new_payloads(action: Action) -> list[dict]:
+            payloads = [
+                e["payload"]["payload"]["payload"] for e in events if e["payload"]["payload"]["action"] == action.value
+            ]
+            return sorted(payloads, key=game_time)
+
+        changed = False
+        for frame in new_payloads(Action.UPDATE_POSITIONS):
+            last_frame = self.game.frames[-1] if self.game.frames else None
+            if last_frame is not None and int(frame.get("gameTime", -1000) / 1000) < last_frame.game_time:
+                continue
+            self._add_position_frame(frame)
+            changed = True
+
+        updates = self._pending_stats + [u for u in new_payloads(Action.UPDATE) if "gameTime" in u]
+        self._pending_stats = [u for u in updates if not self._apply_stats(u)]
+        return changed or len(self._pending_stats) < len(updates)
+
+    @property
+    def kept_actions(self) -> frozenset[Action]:
+        """Actions of the events kept by the parse, metrics reading other actions raise a ValueError."""
+        return self.events.kept_actions
+
+    @property
+    def urn(self) -> str:
+        """Game urn, without decoding the frames of a cached game."""
+        return self._game.urn if self._game is not None else self.columns.game_urn
+
+    @property
+    def start_time(self) -> str | None:
+        """Game start time, read from the announce without decoding the frames of a cached game."""
+        announce = self.events.first(Action.ANNOUNCE)
+        return announce["fixture"]["startTime"] if announce is not None else None
+
+    def _frames_count(self) -> int:
+        return len(self.columns.times) if "columns" in self.__dict__ else len(self.game.frames)
+
+    def _metric_source(self) -> dict:
+        """Columns if they are already built (cached games), frames otherwise, see MetricRegistry.evaluate."""
+        return {"columns": self.columns} if "columns" in self.__dict__ else {"game": self.game}
+
+    @cached_property
+    def columns(self) -> ColumnarGame:
+        """Columnar (time, player) / (time, team) arrays of the game frames, built on first access."""
+        return ColumnarGame.from_game(self.game)
+
+    def time_series(self, step: int = 1) -> GameSeries:
+        """Gold, XP, CS, kills and objectives series of the game, on a grid of step seconds (see timeseries.py)."""
+        return GameSeries(self.columns, step=step)
+
+    def spatial_index(self, cell_size: int = 1000, slice_seconds: int = 60) -> SpatialIndex:
+        """Positions of the game indexed for heatmaps and region queries (see spatial.py)."""
+        return SpatialIndex([self.columns], cell_size=cell_size, slice_seconds=slice_seconds)
+
+    @profiled("get_teams_stats", events=lambda self: self._frames_count())
+    def get_teams_stats(self, metrics: MetricRegistry = DEFAULT_METRICS) -> dict[str, TeamResults]:
+        """Gather some team statistics, computed from the team metrics of the registry (see metrics.py).
+
+        Args:
+            metrics (MetricRegistry, optional): Metrics to compute. Defaults to DEFAULT_METRICS.
+
+        Returns:
+            dict[str, TeamResults]: Results of each team, by team urn.
         """
-        # Get only stats frames with relevent data logged
-        frames = [f for f in self.game.frames if len(f.teams) > 0]
-        stats = dict()
-        
-        # Get 10, 15 and 20 minutes frames
-        frame_10 = get_first_frame_at_time(frames, 10 * 60)
-        frame_15 = get_first_frame_at_time(frames, 15 * 60)
-        frame_20 = get_first_frame_at_time(frames, 20 * 60)
-        
-        # First events
-        ancient_frames = [d["payload"]["payload"]["payload"] for d in self.data if d["payload"]["payload"]["action"] == Action.KILLED_ANCIENT.value]
-        first_baron = get_first_team_objective(ancient_frames, "monsterType", "baron")
-        first_dragon = get_first_team_objective(ancient_frames, "monsterType", "dragon")
-        first_rift_herald = get_first_team_objective(ancient_frames, "monsterType", "riftHerald")
-        objective_frames = [d["payload"]["payload"]["payload"] for d in self.data if d["payload"]["payload"]["action"] == Action.TOOK_OBJECTIVE.value]
-        first_turret = get_first_team_objective(objective_frames, "buildingType", "turret")
-        first_inhibitor = get_first_team_objective(objective_frames, "buildingType", "turret")
-        objective_frames = [d["payload"]["payload"]["payload"] for d in self.data if d["payload"]["payload"]["action"] == Action.SPECIAL_KILL.value]
-        first_blood = get_first_team_objective(objective_frames, "killType", "firstBlood")
-                
-        for i, team in enumerate(frames[-1].teams):
-            final_gold_diff = team.total_gold - frames[-1].teams[0 if i == 1 else 1].total_gold
-            stats[team.urn] = TeamResults(
-                kda=round((team.champions_kills + team.assists) / max(1, team.deaths), 1),
-                rift_herald_kills=len([f for f in ancient_frames if f.get("monsterType", "") == "riftHerald" and f.get("killerTeamUrn", "") == team.urn]),
-                dragon_kills=team.dragon_kills,
-                baron_kills=team.baron_kills,
-                tower_kills=team.tower_kills,
-                inhib_kills=team.inhib_kills,
-                plates=len([f for f in objective_frames if f.get("buildingType", "") == "turretPlate" and f.get("killerTeamUrn", "") == team.urn]),
-                first_blood=first_blood == team.urn,
-                gold_diff_10=frame_10.teams[i].total_gold - frame_10.teams[0 if i == 1 else 1].total_gold if frame_10 is not None else final_gold_diff,
-                gold_diff_15=frame_15.teams[i].total_gold - frame_15.teams[0 if i == 1 else 1].total_gold if frame_15 is not None else final_gold_diff,
-                gold_diff_20=frame_20.teams[i].total_gold - frame_20.teams[0 if i == 1 else 1].total_gold if frame_20 is not None else final_gold_diff,
-                gold_diff_end=final_gold_diff,
-                first_rift_herald=first_rift_herald == team.urn,
-                first_dragon=first_dragon == team.urn,
-                first_baron=first_baron == team.urn,
-                first_turret=first_turret == team.urn,
-                first_inhibitor=first_inhibitor == team.urn,
-            )
         # FIXME : How can I know who wins
-        return stats
+        return metrics.team_results(self.events, **self._metric_source())
+
+    @profiled("get_players_stats", events=lambda self: self._frames_count())
+    def get_players_stats(self, metrics: MetricRegistry = DEFAULT_METRICS) -> dict[str, PlayerResults]:
+        """Same as get_teams_stats, for each player (by player urn) with the player metrics of the registry."""
+        return metrics.player_results(self.events, **self._metric_source())
 
-    def position_map(self, gif_path: Path = None) -> None:    
+    @profiled("position_map", events=lambda self: len(self.columns.times))
+    def position_map(
+        self,
+        gif_path: Path = None,
+        stride: int = 1,
+        start: int | None = None,
+        end: int | None = None,
+        workers: int | None = None,
+    ) -> None:
         """Generates an animation of players moving on a map during game.
 
         Args:
-            gif_path (Path, optional): Path where a GIF of the animation should be saved.
-            If None, no GIF is saved. Defaults to None.
+            gif_path (Path, optional): Path where a GIF (or MP4) of the animation should be saved.
+            If None, no GIF is saved and the animation is shown. Defaults to None.
+            stride (int, optional): Saved animation keeps one frame every stride frames. Defaults to 1.
+            start (int, optional): Saved animation first game time, in seconds. Defaults to None.
+            end (int, optional): Saved animation last game time, in seconds. Defaults to None.
+            workers (int, optional): Number of processes rendering the saved animation. Defaults to the CPU count.
         """
-        player_info = {p.urn: {"team": t.urn, "name": p.summoner_name} for t in self.game.teams for p in t.players}
-        d = {
-            "game_time": [f.game_time for f in self.game.frames for p in f.players if p.position is not None],
-            "x": [p.position.x for f in self.game.frames for p in f.players if p.position is not None],
-            "y": [p.position.y for f in self.game.frames for p in f.players if p.position is not None],
-            "player": [player_info[p.urn]["name"] for f in self.game.frames for p in f.players if p.position is not None],
-            "team": [player_info[p.urn]["team"] for f in self.game.frames for p in f.players if p.position is not None],
-        }
-        
-        df = pd.DataFrame(data=d)
+        columns = self.columns
+        if gif_path:
+            # Frames are drawn directly on the map and streamed into the file, see render.MapRenderer
+            MapRenderer(columns).save(gif_path, stride=stride, start=start, end=end, workers=workers)
+            return
+
+        player_names = dict(zip(columns.player_urns, columns.player_names))
+        df = columns.player_dataframe(["x", "y"])
+        df = df[df["has_position"]]
+        df = df.assign(
+            player=df["player"].map(player_names).astype(object),
+            team=np.asarray(columns.team_urns, dtype=object)[df["team"].to_numpy()],
+        )
             
         fig = px.scatter(
             df,
@@ -200,8 +425,8 @@ class BayesParser:
             animation_group="player",
             color="team",
             hover_name="player",
-            range_x=[-1000, 16000],
-            range_y=[-1000, 16000],
+            range_x=MAP_RANGE,
+            range_y=MAP_RANGE,
             width=900, height=900,
         )
         
@@ -233,25 +458,4 @@ class BayesParser:
                 layer="below")]
         )
         
-        if gif_path:
-            # generate images for each step in animation
-            frames = []
-            for s, fr in enumerate(fig.frames):
-                # set main traces to appropriate traces within plotly frame
-                fig.update(data=fr.data)
-                # move slider to correct place
-                fig.layout.sliders[0].update(active=s)
-                # generate image of current state
-                frames.append(Image.open(io.BytesIO(fig.to_image(format="png"))))
-                
-            # create animated GIF
-            frames[0].save(
-                    gif_path,
-                    save_all=True,
-                    append_images=frames[1:],
-                    optimize=True,
-                    duration=50,
-                    loop=0,
-                )
-        else:
-            fig.show()
\ No newline at end of file
+        fig.show()
\ No newline at end of file
@@ -0,0 +1,50 @@
+import argparse
+import json
+import time
+from pathlib import Path
+from loader import JSON_BACKEND, EventLoader, event_paths
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Compare event loading throughput against the serial json loader")
+    parser.add_argument("-p", "--path", type=str, help="Bayes folder path to load", required=True)
+    parser.add_argument("-w", "--workers", type=int, nargs="+", default=[1, 4, 8], help="Pool sizes to benchmark")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Runs per loader, best time is kept")
+    return parser.parse_args()
+
+
+def serial_json_load(directory: Path) -> list[dict]:
+    # What BayesParser used to do, with files closed
+    events = []
+    for path in event_paths(directory):
+        with open(path, "r") as f:
+            events.append(json.load(f))
+    return events
+
+
+def best_time(load, repeat: int) -> tuple[float, int]:
+    best, count = float("inf"), 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = len(load())
+        best = min(best, time.perf_counter() - start)
+    return best, count
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+
+    path = Path(args.path)
+    if not path.exists():
+        raise FileNotFoundError(f"{path}")
+
+    loaders = {"serial json.load": lambda: serial_json_load(path)}
+    for workers in args.workers:
+        loaders[f"{JSON_BACKEND} threads x{workers}"] = lambda w=workers: EventLoader(workers=w).load(path)
+        loaders[f"{JSON_BACKEND} processes x{workers}"] = lambda w=workers: EventLoader(workers=w, use_processes=True).load(path)
+
+    reference = None
+    for name, load in loaders.items():
+        elapsed, count = best_time(load, args.repeat)
+        reference = reference or elapsed
+        print(f"{name:<28} {count:>8} events  {elapsed:8.3f}s  {count / elapsed:>10.0f} events/s  x{reference / elapsed:.2f}")
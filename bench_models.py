@@ -0,0 +1,67 @@
+import argparse
+import time
+from pathlib import Path
+from bayes_models import PlayerFrame, TeamFrame
+from bayes_parser import BayesParser
+from event_store import Action, EventStore
+from loader import EventLoader
+from trusted import build
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Compare validated models against trusted records, per frame and per game")
+    parser.add_argument("-p", "--path", type=str, help="Bayes folder path to load", required=True)
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Runs per benchmark, best time is kept")
+    return parser.parse_args()
+
+
+def best_time(run, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(name: str, strict: float, trusted: float, count: int, unit: str) -> None:
+    print(
+        f"{name:<24} strict {strict / count * 1e6:9.1f}us/{unit}  "
+        f"trusted {trusted / count * 1e6:9.1f}us/{unit}  x{strict / trusted:.2f}"
+    )
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+
+    path = Path(args.path)
+    if not path.exists():
+        raise FileNotFoundError(f"{path}")
+
+    events = EventStore(EventLoader().load(path))
+    parser = BayesParser.__new__(BayesParser)
+    positions = events.payloads(Action.UPDATE_POSITIONS)
+    updates = [u for u in events.payloads(Action.UPDATE) if "gameTime" in u]
+    teams = [u[team] for u in updates for team in ["teamOne", "teamTwo"]]
+    # Positions are parsed separately, as parse_stats does
+    players = [{k: v for k, v in p.items() if k != "position"} for team in teams for p in team["players"]]
+
+    def position_frames(trusted: bool):
+        return lambda: [parser._position_frame(f, trusted=trusted) for f in positions]
+
+    strict = best_time(position_frames(False), args.repeat)
+    trusted = best_time(position_frames(True), args.repeat)
+    report("position frame", strict, trusted, len(positions), "frame")
+
+    # Team frames are validated in trusted mode too, records are timed for reference
+    strict = best_time(lambda: [TeamFrame(**t) for t in teams], args.repeat)
+    trusted = best_time(lambda: [build(TeamFrame, t) for t in teams], args.repeat)
+    report("team stats", strict, trusted, len(teams), "team")
+
+    strict = best_time(lambda: [PlayerFrame(**p) for p in players], args.repeat)
+    trusted = best_time(lambda: [build(PlayerFrame, p) for p in players], args.repeat)
+    report("player stats", strict, trusted, len(players), "player")
+
+    strict = best_time(lambda: BayesParser(path, strict=True), args.repeat)
+    trusted = best_time(lambda: BayesParser(path, strict=False), args.repeat)
+    report("whole game", strict, trusted, 1, "game")
@@ -0,0 +1,106 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from bayes_parser import BayesParser
+from loader import JSON_BACKEND
+from profiling import Profiler
+from synthetic import generate_game
+
+STAGES = ["load", "index", "init_game", "parse_positions", "parse_stats", "get_teams_stats", "position_map"]
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Time and track peak memory of each parsing stage on synthetic games")
+    parser.add_argument("-m", "--minutes", type=float, nargs="+", default=[10, 30, 60], help="Game lengths to benchmark")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Timed runs per game, best time is kept")
+    parser.add_argument("-o", "--output", type=str, default=None, help="JSON file to write results into")
+    parser.add_argument("-c", "--compare", type=str, default=None, help="JSON results of a previous run to compare with")
+    parser.add_argument("--fast", action="store_true", help="Benchmark the trusted mode (strict=False)")
+    parser.add_argument("--render-stride", type=int, default=10, help="position_map renders one frame every N frames")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the games")
+    return parser.parse_args()
+
+
+def run_once(path: Path, render_path: Path, strict: bool, render_stride: int, trace_memory: bool) -> tuple[dict, BayesParser]:
+    profiler = Profiler(trace_memory=trace_memory)
+    try:
+        bp = BayesParser(path, strict=strict, profiler=profiler)
+        bp.get_teams_stats()
+        # Rendered in this process so that its memory is traced
+        bp.position_map(gif_path=render_path, stride=render_stride, workers=1)
+    finally:
+        profiler.close()
+    return {s.name: s for s in profiler.stages}, bp
+
+
+def benchmark_game(path: Path, repeat: int, strict: bool, render_stride: int) -> dict:
+    render_path = path.with_suffix(".gif")
+    runs = [run_once(path, render_path, strict, render_stride, trace_memory=False)[0] for _ in range(repeat)]
+    # Memory is measured in a separate run, tracemalloc slows allocations down
+    memory, bp = run_once(path, render_path, strict, render_stride, trace_memory=True)
+    return {
+        "events": len(bp.data),
+        "frames": len(bp.game.frames),
+        "stages": {
+            stage: {
+                "seconds": min(run[stage].wall_seconds for run in runs),
+                "cpu_seconds": min(run[stage].cpu_seconds for run in runs),
+                "peak_bytes": memory[stage].peak_bytes,
+            }
+            for stage in STAGES
+        },
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: list[dict], previous: dict | None = None) -> None:
+    baseline = {r["minutes"]: r for r in previous["results"]} if previous is not None else dict()
+    for result in results:
+        print(f"{result['minutes']:g} min game, {result['events']} events, {result['frames']} frames")
+        reference = baseline.get(result["minutes"])
+        for stage, measure in result["stages"].items():
+            line = f"  {stage:<16} {measure['seconds']:9.4f}s  {measure['peak_bytes'] / 1024 ** 2:9.1f} MB"
+            if reference is not None and stage in reference["stages"]:
+                before = reference["stages"][stage]
+                line += f"  time x{measure['seconds'] / max(before['seconds'], 1e-9):.2f}"
+                line += f"  memory x{measure['peak_bytes'] / max(before['peak_bytes'], 1):.2f}"
+            print(line)
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    previous = json.loads(Path(args.compare).read_text()) if args.compare else None
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for minutes in args.minutes:
+            path = Path(tmp) / f"game_{minutes:g}"
+            generate_game(path, seconds=int(minutes * 60), seed=args.seed)
+            results.append({"minutes": minutes, **benchmark_game(path, args.repeat, not args.fast, args.render_stride)})
+
+    print_results(results, previous)
+    if args.output:
+        report = {
+            "commit": git_commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "json_backend": JSON_BACKEND,
+            "strict": not args.fast,
+            "seed": args.seed,
+            "results": results,
+        }
+        Path(args.output).write_text(json.dumps(report, indent=2))
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import zipfile
+import zlib
+from pathlib import Path
+from typing import Iterable
+import numpy as np
+from bayes_models import Frame, Game
+from columnar import ColumnarGame
+from event_store import Action, EventStore
+from loader import event_number, loads
+from trusted import build
+
+
+# Bump when the cached content or the parsing changes, older entries are then ignored and evicted
+CACHE_FORMAT_VERSION = 3
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "map-lol"
+
+# Bulky actions already materialized in the game frames, they are not cached
+FRAME_ACTIONS = (Action.UPDATE, Action.UPDATE_POSITIONS)
+
+
+def fingerprint(source: Path) -> str:
+    """Fingerprint of a game source, made of its event files count, names, sizes and mtimes.
+    Any file added, removed or rewritten changes it.
+    """
+    source = Path(source).resolve()
+    if source.is_dir():
+        # scandir entries cache their stat, much faster than Path.stat on folders of thousands of files
+        with os.scandir(source) as it:
+            files = sorted(
+                ((event_number(e.name), e.name, e.stat()) for e in it if e.is_file() and event_number(e.name) is not None),
+                key=lambda f: f[0],
+            )
+    else:
+        files = [(0, source.name, source.stat())]
+    h = hashlib.sha256(f"{CACHE_FORMAT_VERSION}:{source}:{len(files)}".encode())
+    for _, name, stat in files:
+        h.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return h.hexdigest()
+
+
+def _to_bytes(obj) -> np.ndarray:
+    return np.frombuffer(json.dumps(obj).encode(), dtype=np.uint8)
+
+
+def _from_bytes(array: np.ndarray):
+    return loads(array.tobytes())
+
+
+class CachedGame:
+    """Parsed game read from the cache. Columns and events are available right away, the Game frames
+    are read from the entry and decoded on first call of load_game only.
+    """
+
+    def __init__(self, events: list[dict], columns: ColumnarGame, path: Path, actions: frozenset[Action]) -> None:
+        self.events = events
+        # Actions of the cached events
+        self.actions = actions
+        self.columns = columns
+        self.path = path
+
+    def load_game(self, strict: bool = True) -> Game:
+        """Decode the cached game. Frames are pydantic models if strict, records otherwise (see trusted.py).
+        Frames may have been cached as models (keys are aliases) or records (keys are field names).
+        Raises the errors of GameCache.get if the entry was evicted or damaged since.
+        """
+        with np.load(self.path, allow_pickle=False) as npz:
+            game_json = npz["game"].tobytes()
+        if strict:
+            return Game.model_validate_json(game_json, by_alias=True, by_name=True)
+        data = loads(game_json)
+        frames = data.pop("frames", [])
+        game = Game.model_validate(data, by_alias=True, by_name=True)
+        game.frames = [build(Frame, f) for f in frames]
+        return game
+
+
+class GameCache:
+    """On-disk cache of parsed games, one compressed .npz file per game source.
+
+    Entries are keyed by the source fingerprint, so a modified folder is parsed again.
+    When the cache directory grows over max_bytes, least recently used entries are removed.
+    """
+
+    def __init__(self, directory: Path = DEFAULT_CACHE_DIR, max_bytes: int = 2 * 1024 ** 3) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, source: Path) -> Path:
+        return self.directory / f"{fingerprint(source)}.npz"
+
+    def get(self, source: Path, actions: Iterable[Action] | None = None) -> CachedGame | None:
+        """Returns the cached game of source, None if it is not cached or outdated.
+
+        Args:
+            source (Path): Game source.
+            actions (Iterable[Action], optional): Actions of the events needed, an entry that was cached
+            without some of them is a miss. Defaults to every action not materialized in frames.
+        """
+        path = self.path(source)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                meta = _from_bytes(npz["meta"])
+                if meta["version"] != CACHE_FORMAT_VERSION:
+                    raise ValueError(f"Outdated cache format {meta['version']}")
+                if meta["actions"] is not None and (actions is None or not {a.value for a in actions} <= set(meta["actions"])):
+                    # Cached with fewer events, put replaces it
+                    return None
+                columns = ColumnarGame(
+                    game_urn=meta["game_urn"],
+                    times=npz["times"],
+                    player_urns=meta["player_urns"],
+                    player_names=meta["player_names"],
+                    player_teams=npz["player_teams"],
+                    team_urns=meta["team_urns"],
+                    players={name: npz[f"players/{name}"] for name in meta["player_fields"]},
+                    teams={name: npz[f"teams/{name}"] for name in meta["team_fields"]},
+                    position_mask=npz["position_mask"],
+                    stats_mask=npz["stats_mask"],
+                    team_mask=npz["team_mask"],
+                )
+                actions = frozenset(Action) - set(FRAME_ACTIONS) if meta["actions"] is None else frozenset(map(Action, meta["actions"]))
+                cached = CachedGame(_from_bytes(npz["events"]), columns, path, actions)
+        except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile, zlib.error):
+            # Corrupted (truncated file, bad deflate stream) or outdated entry, parse again
+            path.unlink(missing_ok=True)
+            return None
+        # Mark the entry as recently used
+        os.utime(path)
+        return cached
+
+    def put(
+        self,
+        source: Path,
+        game: Game,
+        events: EventStore,
+        columns: ColumnarGame,
+        actions: Iterable[Action] | None = None,
+    ) -> Path:
+        """Cache a parsed game, and evict least recently used entries if the cache is full.
+
+        Args:
+            source (Path): Game source.
+            game (Game): Parsed game.
+            events (EventStore): Events of the game.
+            columns (ColumnarGame): Columns of the game.
+            actions (Iterable[Action], optional): Actions of the events to cache, e.g. metrics.STATS_ACTIONS.
+            Defaults to every action not materialized in frames (FRAME_ACTIONS).
+        """
+        kept = None if actions is None else sorted({a.value for a in actions} - {a.value for a in FRAME_ACTIONS})
+        path = self.path(source)
+        meta = {
+            "version": CACHE_FORMAT_VERSION,
+            "source": str(Path(source).resolve()),
+            "game_urn": columns.game_urn,
+            "player_urns": columns.player_urns,
+            "player_names": columns.player_names,
+            "team_urns": columns.team_urns,
+            "player_fields": list(columns.players),
+            "team_fields": list(columns.teams),
+            "actions": kept,
+        }
+        arrays = {
+            "meta": _to_bytes(meta),
+            # Records of trusted frames are serialized as dataclasses, no need to warn about it
+            "game": np.frombuffer(game.model_dump_json(by_alias=True, exclude_none=True, warnings=False).encode(), dtype=np.uint8),
+            "events": _to_bytes(list(
+                events.raw_events(exclude=FRAME_ACTIONS) if kept is None else events.raw_events(include=map(Action, kept))
+            )),
+            "times": columns.times,
+            "player_teams": columns.player_teams,
+            "position_mask": columns.position_mask,
+            "stats_mask": columns.stats_mask,
+            "team_mask": columns.team_mask,
+            **{f"players/{name}": array for name, array in columns.players.items()},
+            **{f"teams/{name}": array for name, array in columns.teams.items()},
+        }
+        # Write then rename, so that a concurrent reader never sees a partial file
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, path)
+        self.evict()
+        return path
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for p in self.directory.glob("*.npz"):
+            try:
+                entries.append((p.stat(), p))
+            except FileNotFoundError:
+                # Evicted by another process in the meantime
+                continue
+        total = sum(stat.st_size for stat, _ in entries)
+        for stat, p in sorted(entries, key=lambda e: e[0].st_mtime):
+            if total <= self.max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            total -= stat.st_size
+
+    def clear(self) -> None:
+        for p in self.directory.glob("*.npz"):
+            p.unlink(missing_ok=True)
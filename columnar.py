@@ -0,0 +1,181 @@
+from types import UnionType
+from typing import get_args
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+from bayes_models import Game, PlayerFrame, StatsFrame, TeamFrame
+
+
+# Floats are kept as float64, float32 changes the logged decimals (337768.74 reads back as 337768.75)
+NUMERIC_DTYPES = {int: np.int32, float: np.float64, bool: np.bool_}
+
+
+def numeric_fields(model: type[BaseModel]) -> dict[str, np.dtype]:
+    """Scalar numeric fields of a model (optional or not) with the dtype used to store them."""
+    fields = dict()
+    for name, field in model.model_fields.items():
+        annotation = field.annotation
+        if isinstance(annotation, UnionType):
+            annotation = next((a for a in get_args(annotation) if a is not type(None)), None)
+        if annotation in NUMERIC_DTYPES:
+            fields[name] = NUMERIC_DTYPES[annotation]
+    return fields
+
+
+# PlayerFrame and StatsFrame scalar fields are flattened in the same namespace, names don't collide
+PLAYER_FIELDS = numeric_fields(PlayerFrame)
+STATS_FIELDS = numeric_fields(StatsFrame)
+TEAM_FIELDS = numeric_fields(TeamFrame)
+
+
+class ColumnarGame:
+    """Columnar view of the frames of a game.
+
+    Player values are dense (time, player) arrays, team values are (time, team) arrays,
+    and masks tell which samples were logged : positions are logged every second but stats
+    only every 5 seconds. Missing samples are zeros.
+    Arrays of a 40 minutes game take a few MB, where the Frame models take hundreds.
+    """
+
+    def __init__(
+        self,
+        game_urn: str,
+        times: np.ndarray,
+        player_urns: list[str],
+        player_names: list[str | None],
+        player_teams: np.ndarray,
+        team_urns: list[str],
+        players: dict[str, np.ndarray],
+        teams: dict[str, np.ndarray],
+        position_mask: np.ndarray,
+        stats_mask: np.ndarray,
+        team_mask: np.ndarray,
+    ) -> None:
+        self.game_urn = game_urn
+        self.times = times
+        self.player_urns = player_urns
+        self.player_names = player_names
+        self.player_teams = player_teams
+        self.team_urns = team_urns
+        self.players = players
+        self.teams = teams
+        self.position_mask = position_mask
+        self.stats_mask = stats_mask
+        self.team_mask = team_mask
+
+    @classmethod
+    def from_game(cls, game: Game) -> "ColumnarGame":
+        """Build columns in a single walk over the frames of game."""
+        team_urns = [t.urn for t in game.teams or []]
+        player_urns, player_names, player_teams = [], [], []
+        for t_idx, team in enumerate(game.teams or []):
+            for player in team.players or []:
+                player_urns.append(player.urn)
+                player_names.append(player.summoner_name)
+                player_teams.append(t_idx)
+
+        timeline = game.timeline
+        if not player_urns and len(timeline) > 0:
+            # No announce participants, use the players of the first frame
+            player_urns = [p.urn for p in timeline.frames[0].players]
+            player_names = [None] * len(player_urns)
+            player_teams = [-1] * len(player_urns)
+
+        columns = {urn: c for c, urn in enumerate(player_urns)}
+        team_columns = {urn: c for c, urn in enumerate(team_urns)}
+        n_times, n_players, n_teams = len(timeline), len(player_urns), len(team_urns)
+
+        players = {name: np.zeros((n_times, n_players), dtype=dtype) for name, dtype in {**PLAYER_FIELDS, **STATS_FIELDS}.items()}
+        players["x"] = np.zeros((n_times, n_players), dtype=np.int32)
+        players["y"] = np.zeros((n_times, n_players), dtype=np.int32)
+        teams = {name: np.zeros((n_times, n_teams), dtype=dtype) for name, dtype in TEAM_FIELDS.items()}
+        position_mask = np.zeros((n_times, n_players), dtype=bool)
+        stats_mask = np.zeros((n_times, n_players), dtype=bool)
+        team_mask = np.zeros((n_times, n_teams), dtype=bool)
+
+        for t, frame in enumerate(timeline.frames):
+            for p in frame.players:
+                c = columns.get(p.urn)
+                if c is None:
+                    continue
+                if p.position is not None:
+                    players["x"][t, c] = p.position.x
+                    players["y"][t, c] = p.position.y
+                    position_mask[t, c] = True
+                if p.stats is None:
+                    # Position only frame
+                    continue
+                stats_mask[t, c] = True
+                for name in PLAYER_FIELDS:
+                    value = getattr(p, name)
+                    if value is not None:
+                        players[name][t, c] = value
+                for name in STATS_FIELDS:
+                    players[name][t, c] = getattr(p.stats, name)
+            for team in frame.teams:
+                c = team_columns.get(team.urn)
+                if c is None:
+                    continue
+                team_mask[t, c] = True
+                for name in TEAM_FIELDS:
+                    teams[name][t, c] = getattr(team, name)
+
+        return cls(
+            game_urn=game.urn,
+            times=np.array(timeline.times, dtype=np.int32),
+            player_urns=player_urns,
+            player_names=player_names,
+            player_teams=np.array(player_teams, dtype=np.int8),
+            team_urns=team_urns,
+            players=players,
+            teams=teams,
+            position_mask=position_mask,
+            stats_mask=stats_mask,
+            team_mask=team_mask,
+        )
+
+    @property
+    def cs(self) -> np.ndarray:
+        """Creep score, minions and neutral minions, shaped (time, player)."""
+        return self.players["minions_killed"] + self.players["neutral_minions_killed"]
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.times, self.player_teams, self.position_mask, self.stats_mask, self.team_mask]
+        arrays += list(self.players.values()) + list(self.teams.values())
+        return sum(a.nbytes for a in arrays)
+
+    def player_dataframe(self, fields: list[str] | None = None) -> pd.DataFrame:
+        """Long format dataframe, one row per (time, player) sample.
+
+        Value columns are flat views on the (time, player) arrays, they are not copied.
+
+        Args:
+            fields (list[str], optional): Player fields to include. Defaults to all of them.
+
+        Returns:
+            pd.DataFrame: game_time, player, team, has_position, has_stats and fields columns.
+        """
+        n_times, n_players = len(self.times), len(self.player_urns)
+        data = {
+            "game_time": np.repeat(self.times, n_players),
+            "player": pd.Categorical.from_codes(np.tile(np.arange(n_players), n_times), categories=self.player_urns),
+            "team": np.tile(self.player_teams, n_times),
+            "has_position": self.position_mask.reshape(-1),
+            "has_stats": self.stats_mask.reshape(-1),
+        }
+        for name in fields or self.players.keys():
+            data[name] = self.players[name].reshape(-1)
+        return pd.DataFrame(data, copy=False)
+
+    def team_dataframe(self, fields: list[str] | None = None) -> pd.DataFrame:
+        """Long format dataframe, one row per (time, team) sample. See player_dataframe."""
+        n_times, n_teams = len(self.times), len(self.team_urns)
+        data = {
+            "game_time": np.repeat(self.times, n_teams),
+            "team": pd.Categorical.from_codes(np.tile(np.arange(n_teams), n_times), categories=self.team_urns),
+            "has_stats": self.team_mask.reshape(-1),
+        }
+        for name in fields or self.teams.keys():
+            data[name] = self.teams[name].reshape(-1)
+        return pd.DataFrame(data, copy=False)
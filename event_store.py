@@ -0,0 +1,139 @@
+from collections import defaultdict
+from enum import Enum
+from typing import Iterable
+
+
+class Action(Enum):
+    KILLED_WARD = 'KILLED_WARD'
+    UPDATE = 'UPDATE'
+    UNDO_ITEM = 'UNDO_ITEM'
+    KILLED_ANCIENT = 'KILLED_ANCIENT'  # Ancient = all camps + krug + baron + rift + dragon
+    CONSUMED_ITEM = 'CONSUMED_ITEM'
+    PLACED_WARD = 'PLACED_WARD'
+    EXPIRED_OBJECTIVE = 'EXPIRED_OBJECTIVE'  # TODO: Verify what this means (herald not used ? Baron buff finished ?)
+    SOLD_ITEM = 'SOLD_ITEM'
+    START_MAP = 'START_MAP'
+    KILL = 'KILL'
+    SPAWNED_ANCIENT = 'SPAWNED_ANCIENT'  # TODO: Verify what ancient means
+    SELECTED_HERO = 'SELECTED_HERO'
+    TOOK_OBJECTIVE = 'TOOK_OBJECTIVE'  # TODO: Verify what objective means (turret, inib, drake, baron, herald ?)
+    SPECIAL_KILL = 'SPECIAL_KILL'  # TODO: Check what special stands for
+    BANNED_HERO = 'BANNED_HERO'
+    END_PAUSE = 'END_PAUSE'
+    PURCHASED_ITEM = 'PURCHASED_ITEM'
+    UPDATE_SCORE = 'UPDATE_SCORE'  # TODO: Verify what this is
+    DIED = 'DIED'
+    PICKED_UP_ITEM = 'PICKED_UP_ITEM'
+    ANNOUNCE = 'ANNOUNCE'
+    SPAWNED = 'SPAWNED'
+    UPDATE_POSITIONS = 'UPDATE_POSITIONS'
+    LEVEL_UP = 'LEVEL_UP'
+    ANNOUNCED_ANCIENT = 'ANNOUNCED_ANCIENT'  # TODO: Verify what ancient means
+
+
+# Payload fields that get their own bucket, e.g. KILLED_ANCIENT events where monsterType == "baron"
+SUB_KEYS = ("monsterType", "buildingType", "killType")
+
+
+def game_time(payload: dict) -> int:
+    """Event game time in ms, events without game time (announce, champ select, ...) come first."""
+    return payload.get("gameTime", -1)
+
+
+class _Bucket:
+    """List of events kept ordered by game time. Sorting is only done when the bucket is read
+    after an event arrived out of order, so that appending stays O(1)."""
+
+    def __init__(self) -> None:
+        self.messages: list[dict] = []
+        self.is_sorted = True
+        self.last_time = -1
+
+    def append(self, message: dict) -> None:
+        gt = game_time(message["payload"]["payload"])
+        if gt < self.last_time:
+            self.is_sorted = False
+        self.last_time = max(self.last_time, gt)
+        self.messages.append(message)
+
+    def ordered(self) -> list[dict]:
+        if not self.is_sorted:
+            # Stable sort, events logged at the same game time keep their arrival order
+            self.messages.sort(key=lambda m: game_time(m["payload"]["payload"]))
+            self.is_sorted = True
+        return self.messages
+
+
+class EventStore:
+    """Events of a game bucketed by Action (and by SUB_KEYS values), built in a single pass.
+
+    Stages query the buckets they need instead of scanning every event of the game,
+    so their cost depends on the number of matching events only.
+    kept_actions are the actions the store has every event of, the events of other actions were dropped
+    by the parse (streaming or cached parses, see BayesParser keep_actions).
+    """
+
+    def __init__(self, events: Iterable[dict] = (), kept_actions: Iterable[Action] | None = None) -> None:
+        self.kept_actions = frozenset(Action if kept_actions is None else kept_actions)
+        self._actions: dict[str, _Bucket] = defaultdict(_Bucket)
+        self._sub_keys: dict[tuple[str, str, str], _Bucket] = defaultdict(_Bucket)
+        self.extend(events)
+
+    def add(self, event: dict) -> None:
+        """Index a raw Bayes event."""
+        message = event["payload"]
+        action = message["payload"]["action"]
+        self._actions[action].append(message)
+        payload = message["payload"]["payload"]
+        for key in SUB_KEYS:
+            if key in payload:
+                self._sub_keys[(action, key, payload[key])].append(message)
+
+    def extend(self, events: Iterable[dict]) -> None:
+        for event in events:
+            self.add(event)
+
+    def messages(self, action: Action, key: str | None = None, value: str | None = None) -> list[dict]:
+        """Messages (event["payload"], with the game urn) of an action, ordered by game time.
+
+        Args:
+            action (Action): Action of the events.
+            key (str, optional): One of SUB_KEYS to filter events on. Defaults to None.
+            value (str, optional): Value of key. Defaults to None.
+        """
+        if key is None:
+            bucket = self._actions.get(action.value)
+        elif key in SUB_KEYS:
+            bucket = self._sub_keys.get((action.value, key, value))
+        else:
+            raise KeyError(f"{key} is not indexed, expected one of {SUB_KEYS}")
+        return bucket.ordered() if bucket is not None else []
+
+    def payloads(self, action: Action, key: str | None = None, value: str | None = None) -> list[dict]:
+        """Same as messages but returns action payloads (event["payload"]["payload"]["payload"])."""
+        return [m["payload"]["payload"] for m in self.messages(action, key, value)]
+
+    def first(self, action: Action, key: str | None = None, value: str | None = None) -> dict | None:
+        """First action payload in game time, None if there is no such event."""
+        messages = self.messages(action, key, value)
+        return messages[0]["payload"]["payload"] if messages else None
+
+    def count(self, action: Action, key: str | None = None, value: str | None = None) -> int:
+        return len(self.messages(action, key, value))
+
+    def raw_events(self, exclude: Iterable[Action] = (), include: Iterable[Action] | None = None) -> Iterable[dict]:
+        """Yield indexed events back in the raw Bayes format, action by action.
+
+        Args:
+            exclude (Iterable[Action], optional): Actions to skip. Defaults to ().
+            include (Iterable[Action], optional): Only actions to yield. Defaults to all of them.
+        """
+        excluded = {action.value for action in exclude}
+        included = None if include is None else {action.value for action in include}
+        for action, bucket in self._actions.items():
+            if action not in excluded and (included is None or action in included):
+                for message in bucket.ordered():
+                    yield {"payload": message}
+
+    def __len__(self) -> int:
+        return sum(len(bucket.messages) for bucket in self._actions.values())
@@ -13,6 +13,7 @@
     devShells.x86_64-linux.default = pkgs.mkShell {
       packages = with pkgs; [
         python3
+        python312Packages.numpy
         python312Packages.plotly
         python312Packages.pandas
         python312Packages.pillow
@@ -0,0 +1,138 @@
+import os
+import time
+from pathlib import Path
+from typing import Iterator
+from bayes_parser import BayesParser
+from event_store import Action
+from loader import event_number, loads
+from results_models import TeamResults
+
+
+class EventTail:
+    """Reads the event files added to a Bayes folder since the last read, in event number order.
+
+    Events are read contiguously: a missing number stops the read, as the directory listing can miss a file
+    that is being created while later files are already listed. The gap is skipped after gap_timeout seconds.
+    A file that can not be decoded yet (the feed is still writing it) is read again on the next call.
+    """
+
+    def __init__(self, directory: Path, gap_timeout: float = 1.0) -> None:
+        self.directory = Path(directory)
+        self.gap_timeout = gap_timeout
+        self.count = 0
+        self._next: int | None = None
+        self._gap_since: float | None = None
+
+    def read(self) -> list[dict]:
+        """Decoded events of the files that landed since the last read."""
+        with os.scandir(self.directory) as it:
+            paths = {
+                n: entry.path for entry in it
+                if (n := event_number(entry.name)) is not None and (self._next is None or n >= self._next)
+            }
+        if not paths:
+            return []
+        if self._next is None:
+            self._next = min(paths)
+
+        events = []
+        while paths:
+            path = paths.pop(self._next, None)
+            if path is None:
+                now = time.monotonic()
+                self._gap_since = self._gap_since or now
+                if now - self._gap_since < self.gap_timeout:
+                    break
+                # The file never landed
+                self._next = min(paths)
+                continue
+            try:
+                with open(path, "rb") as f:
+                    events.append(loads(f.read()))
+            except (ValueError, OSError):
+                # Partially written
+                break
+            self._next += 1
+            self._gap_since = None
+            self.count += 1
+        return events
+
+
+class LiveGame:
+    """Follows a game folder during a live broadcast. Only the new event files are parsed,
+    frames are appended or patched in place (see BayesParser.ingest) and results are updated in place.
+
+    Example:
+        for results in LiveGame(path).follow():
+            print(results)
+    """
+
+    def __init__(self, directory: Path, strict: bool = True, poll_interval: float = 0.1) -> None:
+        """
+        Args:
+            directory (Path): Bayes folder the feed writes into.
+            strict (bool, optional): Validate every frame, see BayesParser. Defaults to True.
+            poll_interval (float, optional): Seconds between two scans of the folder. Defaults to 0.1.
+        """
+        self.tail = EventTail(directory)
+        self.strict = strict
+        self.poll_interval = poll_interval
+        self.parser: BayesParser | None = None
+        # Running results by team urn, the same TeamResults objects are updated during the game
+        self.results: dict[str, TeamResults] = dict()
+        # Events read before the game announce
+        self._buffer: list[dict] = []
+
+    def poll(self) -> bool:
+        """Parse the event files that landed since the last poll.
+
+        Returns:
+            bool: True if results changed.
+        """
+        events = self.tail.read()
+        if not events:
+            return False
+        if self.parser is None:
+            self._buffer.extend(events)
+            if not any(e["payload"]["payload"]["action"] == Action.ANNOUNCE.value for e in events):
+                return False
+            self.parser = BayesParser.from_events(self._buffer, strict=self.strict)
+            self._buffer = []
+        else:
+            self.parser.ingest(events)
+        return self._update_results()
+
+    def _update_results(self) -> bool:
+        if self.parser.last_stats_time is None:
+            # No stats update yet, nothing to compute results from
+            return False
+        changed = False
+        for team_urn, results in self.parser.get_teams_stats().items():
+            current = self.results.get(team_urn)
+            if current is None:
+                self.results[team_urn] = results
+                changed = True
+            elif current != results:
+                for name in TeamResults.model_fields:
+                    setattr(current, name, getattr(results, name))
+                changed = True
+        return changed
+
+    def follow(self, idle_timeout: float | None = None) -> Iterator[dict[str, TeamResults]]:
+        """Poll the folder and yield results every time they change.
+
+        Args:
+            idle_timeout (float, optional): Stop after this many seconds without new event files.
+            Defaults to None, follow until interrupted.
+        """
+        last_event = time.monotonic()
+        while True:
+            read = self.tail.count
+            if self.poll():
+                yield self.results
+            now = time.monotonic()
+            if self.tail.count > read:
+                last_event = now
+            elif idle_timeout is not None and now - last_event >= idle_timeout:
+                return
+            time.sleep(self.poll_interval)
@@ -0,0 +1,159 @@
+import gzip
+import json
+import os
+import re
+import tarfile
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator
+
+try:
+    import orjson
+    JSON_BACKEND = "orjson"
+    _loads = orjson.loads
+except ImportError:
+    JSON_BACKEND = "json"
+    _loads = json.loads
+
+
+# Bayes dumps one event per file : 000001.json, 000002.json, ...
+EVENT_FILE_PATTERN = re.compile(r"^(\d+)\.json$")
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".jsonl", ".jsonl.gz")
+
+
+def loads(raw: bytes | str) -> dict:
+    """Decode a single event with the fastest JSON backend available (orjson if installed)."""
+    return _loads(raw)
+
+
+def event_number(name: str) -> int | None:
+    """Returns the event number of a Bayes event file name, None if the name is not an event file."""
+    match = EVENT_FILE_PATTERN.match(Path(name).name)
+    return int(match.group(1)) if match else None
+
+
+def event_paths(directory: Path) -> list[Path]:
+    """List event files of a Bayes folder, ordered by event number."""
+    numbered = [(event_number(f.name), f) for f in directory.iterdir() if f.is_file()]
+    return [f for _, f in sorted(((n, f) for n, f in numbered if n is not None), key=lambda nf: nf[0])]
+
+
+def _read_and_decode(paths: list[Path]) -> list[dict]:
+    # Module level so that it can be pickled by process pools
+    events = []
+    for path in paths:
+        with open(path, "rb") as f:
+            events.append(_loads(f.read()))
+    return events
+
+
+def _decode_all(raws: list[bytes]) -> list[dict]:
+    return [_loads(raw) for raw in raws]
+
+
+def _chunks(items: list, size: int) -> Iterator[list]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class EventLoader:
+    """Reads and decodes the events of a game, from a Bayes folder or from a single bundle
+    (.zip, .tar(.gz), .jsonl(.gz)) without extracting it.
+
+    Events are always returned in event number order (line order for .jsonl bundles).
+    """
+
+    def __init__(self, workers: int | None = None, use_processes: bool = False, chunk_size: int = 256) -> None:
+        """
+        Args:
+            workers (int, optional): Pool size used to read and decode files. Defaults to the CPU count.
+            Set it to 1 to load serially.
+            use_processes (bool, optional): Decode in a process pool instead of a thread pool.
+            Worth it with the standard json backend on big games, threads are enough with orjson. Defaults to False.
+            chunk_size (int, optional): Number of files handled by a worker task. Defaults to 256.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.use_processes = use_processes
+        self.chunk_size = chunk_size
+
+    def load(self, source: Path) -> list[dict]:
+        """Load every event of a game.
+
+        Args:
+            source (Path): Bayes folder or game bundle.
+
+        Returns:
+            list[dict]: Decoded events, in order.
+        """
+        source = Path(source)
+        if source.is_dir():
+            return self._map(_read_and_decode, event_paths(source))
+        if source.name.endswith((".jsonl", ".jsonl.gz")):
+            return list(self.iter_events(source))
+        return self._map(_decode_all, list(self._iter_archive_members(source)))
+
+    def iter_events(self, source: Path) -> Iterator[dict]:
+        """Lazily yield the events of a game, in order, decoding one chunk at a time.
+        Only a chunk of raw events is kept in memory, use it when the events are consumed once.
+        """
+        source = Path(source)
+        if source.is_dir():
+            for paths in _chunks(event_paths(source), self.chunk_size):
+                yield from _read_and_decode(paths)
+        elif source.name.endswith((".jsonl", ".jsonl.gz")):
+            opener = gzip.open if source.name.endswith(".gz") else open
+            with opener(source, "rb") as f:
+                for line in f:
+                    if line.strip():
+                        yield _loads(line)
+        else:
+            for raw in self._iter_archive_members(source):
+                yield _loads(raw)
+
+    def _iter_archive_members(self, source: Path) -> Iterator[bytes]:
+        """Yield raw event files of a .zip or .tar(.gz) bundle, ordered by event number."""
+        if source.name.endswith(".zip"):
+            with zipfile.ZipFile(source) as archive:
+                members = [(event_number(m.filename), m) for m in archive.infolist() if not m.is_dir()]
+                for _, member in sorted(((n, m) for n, m in members if n is not None), key=lambda nm: nm[0]):
+                    yield archive.read(member)
+        elif source.name.endswith((".tar", ".tar.gz", ".tgz")):
+            with tarfile.open(source, "r:*") as archive:
+                members = [(n, m) for m in archive.getmembers() if m.isfile() and (n := event_number(m.name)) is not None]
+                numbers = [n for n, _ in members]
+                if numbers == sorted(numbers):
+                    for _, member in members:
+                        yield archive.extractfile(member).read()
+                    return
+                # Reading a compressed tar out of order seeks back and decompresses it again for every member,
+                # read members once in archive order instead
+                raw = [(n, i, archive.extractfile(m).read()) for i, (n, m) in enumerate(members)]
+                for _, _, data in sorted(raw, key=lambda r: r[:2]):
+                    yield data
+        else:
+            raise ValueError(f"Unsupported game source {source}, expected a folder or one of {ARCHIVE_SUFFIXES}")
+
+    def _map(self, func, items: list) -> list[dict]:
+        """Apply func on chunks of items in a pool, and flatten the results keeping the order."""
+        if self.workers <= 1 or len(items) <= self.chunk_size:
+            return func(items)
+        events = []
+        with self._executor() as pool:
+            for decoded in pool.map(func, _chunks(items, self.chunk_size)):
+                events.extend(decoded)
+        return events
+
+    def _executor(self) -> Executor:
+        if self.use_processes:
+            return ProcessPoolExecutor(max_workers=self.workers)
+        return ThreadPoolExecutor(max_workers=self.workers)
+
+
+def write_bundle(events: Iterable[dict], path: Path) -> None:
+    """Write events into a .jsonl(.gz) bundle, one event per line."""
+    opener = gzip.open if path.name.endswith(".gz") else open
+    with opener(path, "wt", encoding="utf-8") as f:
+        for event in events:
+            f.write(json.dumps(event, separators=(",", ":")))
+            f.write("\n")
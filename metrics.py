@@ -0,0 +1,329 @@
+import math
+from collections import Counter, defaultdict
+from typing import Any, Callable, Iterable, Literal
+import numpy as np
+from pydantic import BaseModel
+from bayes_models import Frame, Game, PlayerFrame
+from columnar import PLAYER_FIELDS, STATS_FIELDS, TEAM_FIELDS, ColumnarGame
+from event_store import Action, EventStore
+from results_models import PlayerResults, TeamResults
+
+Entity = Literal["team", "player"]
+
+
+class FirstEvent(BaseModel):
+    """Whether the team (or player) is credited with the first event of action matching where."""
+    action: Action
+    where: dict[str, str] = dict()
+    by: str = "killerTeamUrn"  # Payload field holding the urn of the credited team or player
+
+
+class CountEvents(BaseModel):
+    """Number of events of action matching where credited to the team (or player)."""
+    action: Action
+    where: dict[str, str] = dict()
+    by: str = "killerTeamUrn"
+
+
+class ValueAt(BaseModel):
+    """Value of a numeric TeamFrame field (team metrics), or of a numeric PlayerFrame / StatsFrame field or "cs"
+    (player metrics), in the first stats frame at or after minute. Games shorter than minute take the last stats frame.
+    Same rule as timeseries.GameSeries.checkpoints.
+    """
+    field: str
+    minute: float | None = None  # None for the end of the game
+    diff: bool = False  # Minus the value of the other teams, team metrics only
+    default: float = 0  # When the team or player is not in the frame, or there is no stats frame
+
+
+class Formula(BaseModel):
+    """Function of the values of the other metrics of the team (or player), e.g. KDA.
+    Formulas are evaluated last, in registration order.
+    """
+    function: Callable[[dict[str, Any]], Any]
+
+
+Metric = FirstEvent | CountEvents | ValueAt | Formula
+
+
+class _FrameCheckpoint:
+    """Values of a stats frame of the game frames."""
+
+    def __init__(self, frame: Frame, player_slots: dict[str, int]) -> None:
+        self.frame = frame
+        self.player_slots = player_slots
+
+    def team_values(self, field: str) -> dict[str, Any]:
+        return {t.urn: getattr(t, field) for t in self.frame.teams}
+
+    def player_value(self, urn: str, field: str) -> Any:
+        slot = self.player_slots.get(urn)
+        player = self.frame.players[slot] if slot is not None else None
+        if player is None:
+            return None
+        if field == "cs":
+            return int(player.stats.minions_killed + player.stats.neutral_minions_killed) if player.stats is not None else None
+        if field in PlayerFrame.model_fields:
+            return getattr(player, field)
+        return getattr(player.stats, field) if player.stats is not None else None
+
+
+class _ColumnCheckpoint:
+    """Values of a stats row of the game columns."""
+
+    def __init__(self, columns: ColumnarGame, row: int, player_columns: dict[str, int]) -> None:
+        self.columns = columns
+        self.row = row
+        self.player_columns = player_columns
+
+    def team_values(self, field: str) -> dict[str, Any]:
+        logged = self.columns.team_mask[self.row]
+        values = self.columns.teams[field][self.row].tolist()
+        return {urn: value for urn, value, is_logged in zip(self.columns.team_urns, values, logged) if is_logged}
+
+    def player_value(self, urn: str, field: str) -> Any:
+        c = self.player_columns.get(urn)
+        if c is None or not self.columns.stats_mask[self.row, c]:
+            return None
+        if field == "cs":
+            return int(self.columns.cs[self.row, c])
+        return self.columns.players[field][self.row, c].item()
+
+
+class MetricRegistry:
+    """Team and player metrics, declared as first event, event count, value at time or formula.
+
+    All the metrics of a game are evaluated together : each event of the actions they need is read once
+    whatever the number of metrics, and each stats frame they read is looked up once.
+
+    Example:
+        metrics = DEFAULT_METRICS.copy()
+        metrics.register("first_tower_plate", FirstEvent(action=Action.TOOK_OBJECTIVE, where={"buildingType": "turretPlate"}))
+        metrics.register("xp_10", ValueAt(field="experience", minute=10), entity="player")
+        teams = metrics.evaluate(bp.events, game=bp.game)["team"]
+    """
+
+    def __init__(self, team: dict[str, Metric] | None = None, player: dict[str, Metric] | None = None) -> None:
+        self.metrics: dict[Entity, dict[str, Metric]] = {"team": dict(), "player": dict()}
+        for entity, metrics in (("team", team), ("player", player)):
+            for name, metric in (metrics or dict()).items():
+                self.register(name, metric, entity=entity)
+
+    def register(self, name: str, metric: Metric, entity: Entity = "team", replace: bool = False) -> None:
+        """Add a metric.
+
+        Args:
+            name (str): Metric name. Team metrics named after a TeamResults field (player metrics after a
+            PlayerResults field) fill it, others are only returned by evaluate.
+            metric (Metric): Metric declaration.
+            entity (Entity, optional): "team" or "player". Defaults to "team".
+            replace (bool, optional): Replace a metric of the same name. Defaults to False.
+        """
+        registered = self.metrics[entity]
+        if name in registered and not replace:
+            raise ValueError(f"A {entity} metric named {name} is already registered, use replace=True")
+        if isinstance(metric, ValueAt):
+            # Fields stored in the game columns, so that cached games are evaluated without decoding frames
+            if entity == "team" and metric.field not in TEAM_FIELDS:
+                raise KeyError(f"Unknown team field {metric.field}, expected one of {list(TEAM_FIELDS)}")
+            if entity == "player" and metric.field not in ("cs", *PLAYER_FIELDS, *STATS_FIELDS):
+                raise KeyError(f"Unknown player field {metric.field}, expected cs or a numeric PlayerFrame / StatsFrame field")
+            if entity == "player" and metric.diff:
+                raise ValueError("diff is only supported by team metrics")
+        registered[name] = metric
+
+    def copy(self) -> "MetricRegistry":
+        return MetricRegistry(team=self.metrics["team"], player=self.metrics["player"])
+
+    @property
+    def actions(self) -> set[Action]:
+        """Actions of the events the metrics read."""
+        return {
+            metric.action
+            for metrics in self.metrics.values()
+            for metric in metrics.values()
+            if isinstance(metric, (FirstEvent, CountEvents))
+        }
+
+    def evaluate(
+        self,
+        events: EventStore,
+        game: Game | None = None,
+        columns: ColumnarGame | None = None,
+        entities: Iterable[Entity] = ("team", "player"),
+    ) -> dict[Entity, dict[str, dict]]:
+        """Values of the metrics of a game. Values at time are read from the columns if given (cached games),
+        from the frames of the game otherwise.
+
+        Args:
+            events (EventStore): Events of the game.
+            game (Game, optional): Parsed game. Defaults to None.
+            columns (ColumnarGame, optional): Columns of the game, used instead of game. Defaults to None.
+            entities (Iterable[Entity], optional): Evaluate team and / or player metrics. Defaults to both.
+
+        Returns:
+            dict[Entity, dict[str, dict]]: Entity to urn to metric values, in registration order.
+        """
+        if game is None and columns is None:
+            raise ValueError("Metrics need the game or its columns")
+        entities = list(entities)
+        checkpoint_at, urns = self._columns_source(columns) if columns is not None else self._frames_source(game)
+        values = {entity: {urn: dict() for urn in urns[entity]} for entity in entities}
+
+        # Events : one walk over the events of each needed action, shared by its metrics
+        by_action: dict[Action, list[tuple[Entity, str, FirstEvent | CountEvents]]] = defaultdict(list)
+        for entity in entities:
+            for name, metric in self.metrics[entity].items():
+                if isinstance(metric, (FirstEvent, CountEvents)):
+                    by_action[metric.action].append((entity, name, metric))
+        missing = set(by_action) - events.kept_actions
+        if missing:
+            # Counting dropped events would silently give 0
+            raise ValueError(
+                f"Metrics read {sorted(a.value for a in missing)} events that were not kept by the parse, "
+                "add them to BayesParser keep_actions"
+            )
+        firsts: dict[tuple[Entity, str], str | None] = dict()
+        counts: dict[tuple[Entity, str], Counter] = defaultdict(Counter)
+        for action, metrics in by_action.items():
+            for payload in events.payloads(action):
+                for entity, name, metric in metrics:
+                    if isinstance(metric, FirstEvent) and (entity, name) in firsts:
+                        continue
+                    if any(payload.get(key) != value for key, value in metric.where.items()):
+                        continue
+                    if isinstance(metric, FirstEvent):
+                        firsts[(entity, name)] = payload.get(metric.by)
+                    else:
+                        counts[(entity, name)][payload.get(metric.by)] += 1
+
+        # Frames : each checkpoint frame is looked up once, shared by its metrics
+        checkpoints = {
+            metric.minute: checkpoint_at(metric.minute)
+            for entity in entities
+            for metric in self.metrics[entity].values()
+            if isinstance(metric, ValueAt)
+        }
+
+        for entity in entities:
+            metrics = self.metrics[entity]
+            for urn, results in values[entity].items():
+                for name, metric in metrics.items():
+                    if isinstance(metric, FirstEvent):
+                        results[name] = firsts.get((entity, name)) == urn
+                    elif isinstance(metric, CountEvents):
+                        results[name] = counts[(entity, name)][urn]
+                    elif isinstance(metric, ValueAt):
+                        results[name] = self._value_at(entity, urn, metric, checkpoints[metric.minute])
+                for name, metric in metrics.items():
+                    if isinstance(metric, Formula):
+                        results[name] = metric.function(results)
+                values[entity][urn] = {name: results[name] for name in metrics}
+        return values
+
+    @staticmethod
+    def _frames_source(game: Game) -> tuple[Callable, dict[Entity, list[str]]]:
+        # Get only stats frames with relevent data logged
+        stats_timeline = game.timeline.filter(lambda f: len(f.teams) > 0)
+        last_frame = stats_timeline.last()
+
+        def checkpoint_at(minute: float | None) -> _FrameCheckpoint | None:
+            idx = None if minute is None else stats_timeline.index_at_or_after(math.ceil(minute * 60))
+            idx = len(stats_timeline) - 1 if idx is None else idx
+            return _FrameCheckpoint(stats_timeline.frames[idx], stats_timeline.player_slots(idx)) if idx >= 0 else None
+
+        urns: dict[Entity, list[str]] = {
+            "team": [t.urn for t in game.teams or []] or ([t.urn for t in last_frame.teams] if last_frame is not None else []),
+            "player": [p.urn for t in game.teams or [] for p in t.players or []]
+            or ([p.urn for p in last_frame.players] if last_frame is not None else []),
+        }
+        return checkpoint_at, urns
+
+    @staticmethod
+    def _columns_source(columns: ColumnarGame) -> tuple[Callable, dict[Entity, list[str]]]:
+        rows = np.flatnonzero(columns.team_mask.any(axis=1))
+        stats_times = columns.times[rows]
+        player_columns = {urn: c for c, urn in enumerate(columns.player_urns)}
+
+        def checkpoint_at(minute: float | None) -> _ColumnCheckpoint | None:
+            idx = len(rows) if minute is None else int(np.searchsorted(stats_times, math.ceil(minute * 60), side="left"))
+            idx = min(idx, len(rows) - 1)
+            return _ColumnCheckpoint(columns, int(rows[idx]), player_columns) if idx >= 0 else None
+
+        return checkpoint_at, {"team": list(columns.team_urns), "player": list(columns.player_urns)}
+
+    @staticmethod
+    def _value_at(entity: Entity, urn: str, metric: ValueAt, checkpoint: _FrameCheckpoint | _ColumnCheckpoint | None) -> Any:
+        if checkpoint is None:
+            return metric.default
+        if entity == "player":
+            value = checkpoint.player_value(urn, metric.field)
+            return value if value is not None else metric.default
+        teams = checkpoint.team_values(metric.field)
+        value = teams.get(urn)
+        if value is None:
+            return metric.default
+        if metric.diff:
+            value -= sum(v for u, v in teams.items() if u != urn)
+        return value
+
+    def team_results(self, events: EventStore, game: Game | None = None, columns: ColumnarGame | None = None) -> dict[str, TeamResults]:
+        """TeamResults of each team, filled with the team metrics named after its fields. See evaluate."""
+        return {
+            urn: TeamResults(**{name: value for name, value in results.items() if name in TeamResults.model_fields})
+            for urn, results in self.evaluate(events, game=game, columns=columns, entities=["team"])["team"].items()
+        }
+
+    def player_results(self, events: EventStore, game: Game | None = None, columns: ColumnarGame | None = None) -> dict[str, PlayerResults]:
+        """PlayerResults of each player, filled with the player metrics named after its fields. See evaluate."""
+        return {
+            urn: PlayerResults(**{name: value for name, value in results.items() if name in PlayerResults.model_fields})
+            for urn, results in self.evaluate(events, game=game, columns=columns, entities=["player"])["player"].items()
+        }
+
+
+def _kda(values: dict[str, Any]) -> float:
+    return round((values["kills"] + values["assists"]) / max(1, values["deaths"]), 1)
+
+
+DEFAULT_METRICS = MetricRegistry(
+    team={
+        "kills": ValueAt(field="champions_kills"),
+        "deaths": ValueAt(field="deaths"),
+        "assists": ValueAt(field="assists"),
+        "kda": Formula(function=_kda),
+        "first_turret": FirstEvent(action=Action.TOOK_OBJECTIVE, where={"buildingType": "turret"}),
+        "first_rift_herald": FirstEvent(action=Action.KILLED_ANCIENT, where={"monsterType": "riftHerald"}),
+        "first_dragon": FirstEvent(action=Action.KILLED_ANCIENT, where={"monsterType": "dragon"}),
+        "first_baron": FirstEvent(action=Action.KILLED_ANCIENT, where={"monsterType": "baron"}),
+        "first_inhib": FirstEvent(action=Action.TOOK_OBJECTIVE, where={"buildingType": "inhibitor"}),
+        "rift_herald_kills": CountEvents(action=Action.KILLED_ANCIENT, where={"monsterType": "riftHerald"}),
+        "dragon_kills": ValueAt(field="dragon_kills"),
+        "baron_kills": ValueAt(field="baron_kills"),
+        "tower_kills": ValueAt(field="tower_kills"),
+        "inhib_kills": ValueAt(field="inhib_kills"),
+        "plates": CountEvents(action=Action.TOOK_OBJECTIVE, where={"buildingType": "turretPlate"}),
+        "first_blood": FirstEvent(action=Action.SPECIAL_KILL, where={"killType": "firstBlood"}),
+        "gold_diff_10": ValueAt(field="total_gold", minute=10, diff=True),
+        "gold_diff_15": ValueAt(field="total_gold", minute=15, diff=True),
+        "gold_diff_20": ValueAt(field="total_gold", minute=20, diff=True),
+        "gold_diff_end": ValueAt(field="total_gold", diff=True),
+    },
+    player={
+        "kills": ValueAt(field="champions_killed"),
+        "deaths": ValueAt(field="num_deaths"),
+        "assists": ValueAt(field="assists"),
+        "kda": Formula(function=_kda),
+        "first_blood": FirstEvent(action=Action.SPECIAL_KILL, where={"killType": "firstBlood"}, by="killerUrn"),
+        "cs_10": ValueAt(field="cs", minute=10),
+        "cs_end": ValueAt(field="cs"),
+        "gold_10": ValueAt(field="total_gold", minute=10),
+        "gold_end": ValueAt(field="total_gold"),
+        "level_end": ValueAt(field="level"),
+        "vision_score": ValueAt(field="vision_score"),
+        "damage_to_champions": ValueAt(field="total_damage_dealt_champions"),
+    },
+)
+
+# Events kept by streaming parses and stored in the cache : the announce, kills and the events of the default metrics
+STATS_ACTIONS = frozenset({Action.ANNOUNCE, Action.KILL, *DEFAULT_METRICS.actions})
@@ -0,0 +1,154 @@
+import cProfile
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from pathlib import Path
+from typing import Callable, ContextManager, Iterable, Iterator
+from pydantic import BaseModel
+
+
+class StageStats(BaseModel):
+    name: str
+    wall_seconds: float = 0
+    cpu_seconds: float = 0
+    events: int | None = None  # Number of events (or frames) processed by the stage
+    peak_bytes: int | None = None  # Peak memory allocated during the stage, when memory is traced
+    depth: int = 0  # Number of stages the stage runs in
+
+
+class StageHook:
+    """Base class of profiler subscribers (external profilers, metrics exporters, ...), override what you need."""
+
+    def stage_started(self, name: str) -> None:
+        pass
+
+    def stage_finished(self, stats: StageStats) -> None:
+        pass
+
+
+class Profiler:
+    """Records wall time, CPU time, processed events and peak memory of each stage of a parse.
+
+    Pass it to BayesParser(profiler=...). Without profiler, stages are not measured at all.
+    """
+
+    def __init__(self, trace_memory: bool = False, cprofile: bool = False, hooks: Iterable[StageHook] = ()) -> None:
+        """
+        Args:
+            trace_memory (bool, optional): Track peak allocated memory of stages with tracemalloc,
+            which slows allocations down. Defaults to False.
+            cprofile (bool, optional): Run cProfile during stages, see dump_cprofile. Defaults to False.
+            hooks (Iterable[StageHook], optional): Subscribers notified of every stage. Defaults to ().
+        """
+        self.trace_memory = trace_memory
+        self.stages: list[StageStats] = []
+        self.hooks: list[StageHook] = list(hooks)
+        self._cprofile = cProfile.Profile() if cprofile else None
+        self._started_tracing = False
+        # Absolute memory peaks of running stages, and number of running stages
+        self._peaks: list[int] = []
+        self._depth = 0
+
+    def subscribe(self, hook: StageHook) -> None:
+        self.hooks.append(hook)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageStats]:
+        """Measure the stage run in the with block, the block can set the events count of the yielded stats.
+        Stages can be nested, the peak memory of a stage includes the peaks of its sub-stages.
+        """
+        stats = StageStats(name=name, depth=self._depth)
+        # Listed in start order, sub-stages after their stage
+        self.stages.append(stats)
+        for hook in self.hooks:
+            hook.stage_started(name)
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            if self._peaks:
+                # Keep the peak of the running stage before resetting it
+                self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            allocated = tracemalloc.get_traced_memory()[0]
+            self._peaks.append(0)
+        if self._cprofile is not None and self._depth == 0:
+            self._cprofile.enable()
+        self._depth += 1
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield stats
+        finally:
+            stats.wall_seconds = time.perf_counter() - wall
+            stats.cpu_seconds = time.process_time() - cpu
+            self._depth -= 1
+            if self._cprofile is not None and self._depth == 0:
+                self._cprofile.disable()
+            if self.trace_memory:
+                peak = max(tracemalloc.get_traced_memory()[1], self._peaks.pop())
+                # Peak on top of what was allocated before the stage
+                stats.peak_bytes = peak - allocated
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+            for hook in self.hooks:
+                hook.stage_finished(stats)
+
+    def close(self) -> None:
+        """Stop tracing memory, if the profiler started it."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def table(self) -> str:
+        """Stages as a text table."""
+        lines = [f"{'stage':<18} {'wall (s)':>10} {'cpu (s)':>10} {'events':>10} {'peak (MB)':>10}"]
+        for s in self.stages:
+            events = f"{s.events}" if s.events is not None else "-"
+            peak = f"{s.peak_bytes / 1024 ** 2:.1f}" if s.peak_bytes is not None else "-"
+            name = "  " * s.depth + s.name
+            lines.append(f"{name:<18} {s.wall_seconds:>10.4f} {s.cpu_seconds:>10.4f} {events:>10} {peak:>10}")
+        top = [s for s in self.stages if s.depth == 0]
+        lines.append(f"{'total':<18} {sum(s.wall_seconds for s in top):>10.4f} {sum(s.cpu_seconds for s in top):>10.4f}")
+        return "\n".join(lines)
+
+    def save_json(self, path: Path) -> None:
+        Path(path).write_text(json.dumps([s.model_dump() for s in self.stages], indent=2))
+
+    def dump_cprofile(self, path: Path) -> None:
+        """Write the cProfile stats of the stages, to read with pstats or snakeviz."""
+        if self._cprofile is None:
+            raise ValueError("Profiler was created without cprofile=True")
+        self._cprofile.dump_stats(path)
+
+
+# Shared by stages run without profiler, so that they can set their events count anyway
+_NOT_PROFILED = nullcontext(StageStats(name="not profiled"))
+
+
+def stage(profiler: Profiler | None, name: str) -> ContextManager[StageStats]:
+    """profiler.stage(name), or a context doing nothing if profiler is None."""
+    return profiler.stage(name) if profiler is not None else _NOT_PROFILED
+
+
+def profiled(name: str, events: Callable[..., int] | None = None) -> Callable:
+    """Decorator measuring a method as a stage of self.profiler.
+
+    Args:
+        name (str): Stage name.
+        events (Callable, optional): Function of self returning the events count of the stage, called
+        after the method. Defaults to None.
+    """
+    def decorator(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.profiler is None:
+                return method(self, *args, **kwargs)
+            with self.profiler.stage(name) as stats:
+                result = method(self, *args, **kwargs)
+                if events is not None:
+                    stats.events = events(self)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,232 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator
+import numpy as np
+from PIL import GifImagePlugin, Image
+from columnar import ColumnarGame
+
+# Game coordinates covered by the map image, same as position_map axes
+MAP_RANGE = (-1000, 16000)
+MAP_IMAGE = Path(__file__).parent / "map_lol.png"
+# Plotly default colors of the first two traces, and marker line color of position_map
+TEAM_COLORS = [(99, 110, 250), (239, 85, 59)]
+OUTLINE_COLOR = (47, 79, 79)
+
+
+def _disk(radius: int) -> np.ndarray:
+    yy, xx = np.mgrid[-radius:radius + 1, -radius:radius + 1]
+    return xx ** 2 + yy ** 2 <= radius ** 2
+
+
+class MapRenderer:
+    """Draws team colored player markers on the map with NumPy, one RGB array per frame.
+
+    Positions are forward filled : a player without position in a frame (stats frames, missing samples)
+    is drawn at its last known position.
+    """
+
+    def __init__(
+        self,
+        columns: ColumnarGame,
+        size: int = 896,
+        marker_radius: int = 15,
+        outline_width: int = 2,
+        background: Path = MAP_IMAGE,
+        opacity: float = 0.7,
+    ) -> None:
+        """
+        Args:
+            columns (ColumnarGame): Columns of the game to render.
+            size (int, optional): Width and height of frames in pixels, a multiple of 16 for videos. Defaults to 896.
+            marker_radius (int, optional): Radius of player markers in pixels. Defaults to 15.
+            outline_width (int, optional): Width of markers outline in pixels. Defaults to 2.
+            background (Path, optional): Map image. Defaults to map_lol.png.
+            opacity (float, optional): Opacity of the map over a white background. Defaults to 0.7.
+        """
+        self.size = size
+        self.times = columns.times
+        self.teams = columns.player_teams
+
+        # Scale background once
+        im = Image.open(background).convert("RGB").resize((size, size), Image.Resampling.BILINEAR)
+        self.background = (255 * (1 - opacity) + np.asarray(im, dtype=np.float32) * opacity).astype(np.uint8)
+
+        # Forward fill positions, then convert them to pixels (image y axis goes down)
+        mask = columns.position_mask
+        last_seen = np.where(mask, np.arange(len(self.times))[:, None], 0)
+        np.maximum.accumulate(last_seen, axis=0, out=last_seen)
+        cols = np.arange(mask.shape[1])[None, :]
+        self.visible = np.maximum.accumulate(mask, axis=0)
+        scale = (size - 1) / (MAP_RANGE[1] - MAP_RANGE[0])
+        self.px = np.rint((columns.players["x"][last_seen, cols] - MAP_RANGE[0]) * scale).astype(np.int32)
+        self.py = np.rint((MAP_RANGE[1] - columns.players["y"][last_seen, cols]) * scale).astype(np.int32)
+
+        self.outline = _disk(marker_radius)
+        self.fill = np.pad(_disk(marker_radius - outline_width), outline_width)
+        self.radius = marker_radius
+
+    def frame_indices(self, stride: int = 1, start: int | None = None, end: int | None = None) -> np.ndarray:
+        """Indices of frames to render, every stride frames with game time in [start, end] seconds."""
+        selected = np.ones(len(self.times), dtype=bool)
+        if start is not None:
+            selected &= self.times >= start
+        if end is not None:
+            selected &= self.times <= end
+        return np.flatnonzero(selected)[::stride]
+
+    def _stamp(self, image: np.ndarray, cx: int, cy: int, mask: np.ndarray, color: tuple[int, int, int]) -> None:
+        r = self.radius
+        # Clip the marker to the image borders
+        x0, y0, x1, y1 = max(cx - r, 0), max(cy - r, 0), min(cx + r + 1, self.size), min(cy + r + 1, self.size)
+        if x0 >= x1 or y0 >= y1:
+            return
+        m = mask[y0 - cy + r:y1 - cy + r, x0 - cx + r:x1 - cx + r]
+        image[y0:y1, x0:x1][m] = color
+
+    def render(self, idx: int) -> np.ndarray:
+        """RGB image of frame idx, shaped (size, size, 3)."""
+        image = self.background.copy()
+        for p in np.flatnonzero(self.visible[idx]):
+            cx, cy = self.px[idx, p], self.py[idx, p]
+            team = self.teams[p]
+            self._stamp(image, cx, cy, self.outline, OUTLINE_COLOR)
+            self._stamp(image, cx, cy, self.fill, TEAM_COLORS[team % len(TEAM_COLORS)] if team >= 0 else OUTLINE_COLOR)
+        return image
+
+    def render_chunk(self, indices: np.ndarray) -> list[np.ndarray]:
+        return [self.render(idx) for idx in indices]
+
+    def iter_frames(self, indices: np.ndarray, workers: int | None = None, chunk_size: int = 8) -> Iterator[np.ndarray]:
+        """Render frames in order, chunks of frames are rendered in parallel.
+        At most workers + 1 chunks are in memory at once.
+        """
+        workers = workers or os.cpu_count() or 1
+        chunks = [indices[i:i + chunk_size] for i in range(0, len(indices), chunk_size)]
+        if workers <= 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                yield from self.render_chunk(chunk)
+            return
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,)) as pool:
+            in_flight = [pool.submit(_render_chunk, chunk) for chunk in chunks[:workers + 1]]
+            next_chunk = len(in_flight)
+            while in_flight:
+                frames = in_flight.pop(0).result()
+                if next_chunk < len(chunks):
+                    in_flight.append(pool.submit(_render_chunk, chunks[next_chunk]))
+                    next_chunk += 1
+                yield from frames
+
+    def save(
+        self,
+        path: Path,
+        fps: int = 20,
+        stride: int = 1,
+        start: int | None = None,
+        end: int | None = None,
+        workers: int | None = None,
+    ) -> int:
+        """Render frames straight into a GIF, or a video (MP4, ... needs imageio-ffmpeg).
+        Frames are written as soon as they are rendered, memory does not grow with the game length.
+        Raises a ValueError if no frame is selected, e.g. start is after end or after the end of the game.
+
+        Args:
+            path (Path): Output file, the format is chosen from the extension.
+            fps (int, optional): Frames per second of the output. Defaults to 20.
+            stride (int, optional): Render one frame every stride frames. Defaults to 1.
+            start (int, optional): First game time rendered, in seconds. Defaults to the beginning.
+            end (int, optional): Last game time rendered, in seconds. Defaults to the end.
+            workers (int, optional): Number of rendering processes. Defaults to the CPU count.
+
+        Returns:
+            int: Number of frames written.
+        """
+        path = Path(path)
+        indices = self.frame_indices(stride, start, end)
+        if len(indices) == 0:
+            # Check before opening the writer, which would leave an empty file behind
+            raise ValueError(f"No frame to render with start={start}, end={end} (game time in seconds)")
+        if path.suffix.lower() == ".gif":
+            writer = GifWriter(path, self.background, duration=int(1000 / fps))
+        else:
+            import imageio.v2 as imageio
+            writer = imageio.get_writer(path, fps=fps)
+        try:
+            for frame in self.iter_frames(indices, workers=workers):
+                writer.append_data(frame)
+        finally:
+            writer.close()
+        return len(indices)
+
+
+_worker_renderer: MapRenderer | None = None
+
+
+def _init_worker(renderer: MapRenderer) -> None:
+    # Send the renderer once per process rather than once per chunk
+    global _worker_renderer
+    _worker_renderer = renderer
+
+
+def _render_chunk(indices: np.ndarray) -> list[np.ndarray]:
+    return _worker_renderer.render_chunk(indices)
+
+
+class GifWriter:
+    """Writes an animated GIF frame by frame, instead of keeping every frame until the file is saved
+    as PIL does. All frames share a palette computed from the background and marker colors, and only
+    pixels that changed since the previous frame are written, the others are transparent.
+    """
+
+    TRANSPARENT = 255
+
+    def __init__(self, path: Path, background: np.ndarray, duration: int = 50, loop: int = 0) -> None:
+        # Palette of the background, with marker colors appended so that they are kept exact.
+        # 255 colors, the last index is kept for transparency
+        marker_colors = [*TEAM_COLORS, OUTLINE_COLOR]
+        background_colors = self.TRANSPARENT - len(marker_colors)
+        palette = Image.fromarray(background).quantize(colors=background_colors, dither=Image.Dither.NONE).getpalette()
+        self.palette = Image.new("P", (1, 1))
+        self.palette.putpalette(palette[:3 * background_colors] + [c for color in marker_colors for c in color])
+
+        self.duration = duration
+        self.loop = loop
+        self._file = open(path, "wb")
+        self._previous: np.ndarray | None = None
+
+    def _indexed(self, pixels: np.ndarray) -> Image.Image:
+        im = Image.fromarray(pixels, mode="P")
+        im.putpalette(self.palette.getpalette())
+        return im
+
+    def append_data(self, frame: np.ndarray) -> None:
+        pixels = np.asarray(Image.fromarray(frame).quantize(palette=self.palette, dither=Image.Dither.NONE))
+        if self._previous is None:
+            im = self._indexed(pixels)
+            header, _ = GifImagePlugin.getheader(im, info={"loop": self.loop, "optimize": False})
+            self._file.write(b"".join(header))
+            self._file.write(b"".join(GifImagePlugin.getdata(im, duration=self.duration)))
+            self._previous = pixels
+            return
+
+        # Write the bounding box of changed pixels, unchanged pixels inside it are transparent
+        changed = pixels != self._previous
+        rows, cols = np.flatnonzero(changed.any(axis=1)), np.flatnonzero(changed.any(axis=0))
+        if len(rows) == 0:
+            y0, y1, x0, x1 = 0, 1, 0, 1
+        else:
+            y0, y1, x0, x1 = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+        delta = np.where(changed[y0:y1, x0:x1], pixels[y0:y1, x0:x1], self.TRANSPARENT).astype(np.uint8)
+        self._file.write(b"".join(GifImagePlugin.getdata(
+            self._indexed(delta),
+            offset=(int(x0), int(y0)),
+            duration=self.duration,
+            transparency=self.TRANSPARENT,
+            disposal=1,  # Keep the previous frame under transparent pixels
+        )))
+        self._previous = pixels
+
+    def close(self) -> None:
+        if self._previous is not None:
+            self._file.write(b";")  # GIF trailer
+        self._file.close()
@@ -19,4 +19,19 @@ class TeamResults(BaseModel):
     gold_diff_10: int = 0
     gold_diff_15: int = 0
     gold_diff_20: int = 0
-    gold_diff_end: int = 0
\ No newline at end of file
+    gold_diff_end: int = 0
+
+
+class PlayerResults(BaseModel):
+    kills: int = 0
+    deaths: int = 0
+    assists: int = 0
+    kda: float = 0
+    first_blood: bool = False
+    cs_10: int = 0
+    cs_end: int = 0
+    gold_10: int = 0
+    gold_end: int = 0
+    level_end: int = 0
+    vision_score: float = 0
+    damage_to_champions: float = 0
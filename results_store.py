@@ -0,0 +1,214 @@
+import os
+from pathlib import Path
+from typing import Iterable
+import numpy as np
+import pandas as pd
+from bayes_models import Game
+from results_models import TeamResults
+
+STORE_FORMAT_VERSION = 1
+KEY_COLUMNS = ["game_urn", "team_urn", "start_time"]
+METRICS = list(TeamResults.model_fields)
+METRIC_DTYPES = {bool: np.bool_, int: np.int64, float: np.float64}
+AGGREGATIONS = ("mean", "sum", "min", "max", "count", "std")
+# Date periods rows can be grouped by, as numpy datetime units. Weeks are handled apart, see _period
+DATE_PERIODS = {"day": "D", "week": "W", "month": "M", "year": "Y"}
+
+
+def _start_time(value: str | np.datetime64 | None) -> np.datetime64:
+    if value is None:
+        return np.datetime64("NaT", "s")
+    # Bayes start times are UTC ISO strings, numpy does not parse the timezone
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert(None)
+    return timestamp.to_datetime64().astype("datetime64[s]")
+
+
+def _period(times: np.ndarray, period: str) -> np.ndarray:
+    """Start of the period (one of DATE_PERIODS) of each time."""
+    if period != "week":
+        return times.astype(f"datetime64[{DATE_PERIODS[period]}]")
+    # numpy weeks start on Thursday (1970-01-01), weeks start on Monday, labelled by their Monday
+    days = times.astype("datetime64[D]")
+    weekday = (days - np.datetime64("1970-01-05", "D")).astype(np.int64) % 7
+    return np.where(np.isnat(days), days, days - weekday.astype("timedelta64[D]"))
+
+
+class ResultsStore:
+    """Persistent columnar store of TeamResults rows, keyed by (game urn, team urn), with the game start time.
+
+    Rows are kept as one NumPy array per column and saved in a single .npz file. Adding the results
+    of a game again replaces its rows. Sorted indexes on team and start time make filters a binary search,
+    so season-wide aggregates never reopen a Bayes folder.
+
+    Example:
+        store = ResultsStore(Path("results.npz"))
+        store.add_game(bp.game, bp.get_teams_stats())
+        store.save()
+        store.aggregate({"first_dragon": "mean", "gold_diff_15": "mean"}, by="team_urn", start="2024-01-01")
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.columns: dict[str, np.ndarray] = {
+            "game_urn": np.empty(0, dtype=str),
+            "team_urn": np.empty(0, dtype=str),
+            "start_time": np.empty(0, dtype="datetime64[s]"),
+            **{name: np.empty(0, dtype=METRIC_DTYPES[field.annotation]) for name, field in TeamResults.model_fields.items()},
+        }
+        if self.path.exists():
+            with np.load(self.path, allow_pickle=False) as npz:
+                if int(npz["version"]) != STORE_FORMAT_VERSION:
+                    raise ValueError(f"Unsupported results store version {int(npz['version'])} in {self.path}")
+                self.columns = {name: npz[name] for name in self.columns}
+        self._pending: dict[tuple[str, str], dict] = dict()
+        self._build_indexes()
+
+    def _build_indexes(self) -> None:
+        game_urns, team_urns = self.columns["game_urn"], self.columns["team_urn"]
+        self._rows = {key: i for i, key in enumerate(zip(game_urns.tolist(), team_urns.tolist()))}
+        # Team index : rows sorted by team urn
+        self._team_order = np.argsort(team_urns, kind="stable")
+        self._team_sorted = team_urns[self._team_order]
+        # Date index : rows sorted by start time, games without start time (NaT) come last
+        self._time_order = np.argsort(self.columns["start_time"], kind="stable")
+        self._time_sorted = self.columns["start_time"][self._time_order]
+
+    def add(self, game_urn: str, team_urn: str, start_time: str | None, results: TeamResults) -> None:
+        """Add (or replace) the results of a team in a game."""
+        self.add_rows([{"game_urn": game_urn, "team_urn": team_urn, "start_time": start_time, **results.model_dump()}])
+
+    def add_game(self, game: Game, stats: dict[str, TeamResults]) -> None:
+        """Add (or replace) the results of every team of a game, as returned by BayesParser.get_teams_stats."""
+        for team_urn, results in stats.items():
+            self.add(game.urn, team_urn, game.start_time, results)
+
+    def add_rows(self, rows: Iterable[dict]) -> None:
+        """Add (or replace) rows with KEY_COLUMNS and TeamResults fields, such as batch.parse_game rows."""
+        for row in rows:
+            self._pending[(row["game_urn"], row["team_urn"])] = row
+
+    def _flush(self) -> None:
+        """Merge pending rows into the columns, replacing rows of the same key."""
+        if not self._pending:
+            return
+        replaced = {self._rows[key]: row for key, row in self._pending.items() if key in self._rows}
+        appended = [row for key, row in self._pending.items() if key not in self._rows]
+        self._pending = dict()
+
+        if replaced:
+            idx = np.fromiter(replaced, dtype=np.int64, count=len(replaced))
+            rows = list(replaced.values())
+            for name, column in self.columns.items():
+                column[idx] = self._column_values(name, rows, column.dtype)
+        if appended:
+            self.columns = {
+                name: np.concatenate([column, self._column_values(name, appended, column.dtype)])
+                for name, column in self.columns.items()
+            }
+        self._build_indexes()
+
+    @staticmethod
+    def _column_values(name: str, rows: list[dict], dtype: np.dtype) -> np.ndarray:
+        if name == "start_time":
+            return np.array([_start_time(row.get("start_time")) for row in rows], dtype="datetime64[s]")
+        if name in ("game_urn", "team_urn"):
+            return np.array([row[name] for row in rows], dtype=str)
+        return np.array([row.get(name, TeamResults.model_fields[name].default) for row in rows], dtype=dtype)
+
+    def save(self) -> None:
+        """Write the store, atomically."""
+        self._flush()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, version=np.array(STORE_FORMAT_VERSION), **self.columns)
+        os.replace(tmp_path, self.path)
+
+    def __len__(self) -> int:
+        self._flush()
+        return len(self.columns["game_urn"])
+
+    def select(
+        self,
+        team: str | Iterable[str] | None = None,
+        start: str | np.datetime64 | None = None,
+        end: str | np.datetime64 | None = None,
+    ) -> np.ndarray:
+        """Indices of rows matching filters, using the team and date indexes.
+
+        Args:
+            team (str | Iterable[str], optional): Team urn(s). Defaults to every team.
+            start (str | np.datetime64, optional): Earliest game start time (included). Defaults to None.
+            end (str | np.datetime64, optional): Latest game start time (excluded). Defaults to None.
+
+        Returns:
+            np.ndarray: Sorted row indices.
+        """
+        self._flush()
+        selected = None
+        if team is not None:
+            teams = np.array([team] if isinstance(team, str) else list(team), dtype=str)
+            lo = np.searchsorted(self._team_sorted, teams, side="left")
+            hi = np.searchsorted(self._team_sorted, teams, side="right")
+            selected = np.concatenate([self._team_order[a:b] for a, b in zip(lo, hi)]) if len(teams) else np.empty(0, dtype=np.int64)
+        if start is not None or end is not None:
+            # NaT sorts last, exclude it from the searched range
+            n_dated = len(self._time_sorted) - int(np.count_nonzero(np.isnat(self._time_sorted)))
+            dated = self._time_sorted[:n_dated]
+            lo = np.searchsorted(dated, _start_time(start), side="left") if start is not None else 0
+            hi = np.searchsorted(dated, _start_time(end), side="left") if end is not None else n_dated
+            in_range = self._time_order[lo:hi]
+            selected = in_range if selected is None else np.intersect1d(selected, in_range)
+        if selected is None:
+            return np.arange(len(self.columns["game_urn"]))
+        return np.sort(selected)
+
+    def dataframe(self, rows: np.ndarray | None = None) -> pd.DataFrame:
+        """Rows (defaults to all) as a dataframe with KEY_COLUMNS and TeamResults fields."""
+        self._flush()
+        rows = np.arange(len(self.columns["game_urn"])) if rows is None else rows
+        return pd.DataFrame({name: column[rows] for name, column in self.columns.items()})
+
+    def aggregate(
+        self,
+        metrics: dict[str, str] | list[str],
+        by: str | list[str] | None = "team_urn",
+        team: str | Iterable[str] | None = None,
+        start: str | np.datetime64 | None = None,
+        end: str | np.datetime64 | None = None,
+    ) -> pd.DataFrame:
+        """Filtered group-by aggregates, e.g. first dragon rate and average gold diff at 15 by team.
+        Booleans are averaged as rates.
+
+        Args:
+            metrics (dict[str, str] | list[str]): TeamResults field to aggregation (one of AGGREGATIONS),
+            or a list of fields to average.
+            by (str | list[str], optional): Columns to group by : team_urn, game_urn, or a start time period
+            (day, week starting on Monday, month, year). None aggregates every selected row. Defaults to "team_urn".
+            team, start, end: Filters, see select.
+
+        Returns:
+            pd.DataFrame: One row per group with a column per metric, and a games column (number of rows).
+        """
+        metrics = dict.fromkeys(metrics, "mean") if isinstance(metrics, list) else metrics
+        for name, how in metrics.items():
+            if name not in METRICS or how not in AGGREGATIONS:
+                raise KeyError(f"Can not aggregate {name} with {how}, expected a TeamResults field and one of {AGGREGATIONS}")
+        rows = self.select(team=team, start=start, end=end)
+
+        data = {name: self.columns[name][rows] for name in metrics}
+        keys = [] if by is None else [by] if isinstance(by, str) else list(by)
+        for key in keys:
+            if key in DATE_PERIODS:
+                data[key] = _period(self.columns["start_time"][rows], key)
+            elif key in ("game_urn", "team_urn"):
+                data[key] = self.columns[key][rows]
+            else:
+                raise KeyError(f"Can not group by {key}, expected game_urn, team_urn or one of {list(DATE_PERIODS)}")
+        df = pd.DataFrame(data)
+        aggregations = {**{name: (name, how) for name, how in metrics.items()}, "games": (next(iter(metrics)), "size")}
+        if not keys:
+            return df.agg({name: how for name, how in metrics.items()}).to_frame().T.assign(games=len(df))
+        return df.groupby(keys, sort=True).agg(**aggregations)
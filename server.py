@@ -0,0 +1,395 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from multiprocessing import get_context
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+from batch import worker_parser
+from cache import DEFAULT_CACHE_DIR, GameCache, fingerprint
+from columnar import ColumnarGame
+from timeseries import PLAYER_METRICS, TEAM_METRICS, GameSeries
+
+# Largest request head (request line and headers) accepted, requests have no body
+MAX_HEAD_BYTES = 16 * 1024
+# Number of recent latencies kept per route to compute percentiles
+LATENCY_WINDOW = 1024
+
+
+class ServedGame:
+    """What the server keeps of a parsed game : teams stats and columns. The Game models are not kept,
+    they take hundreds of MB where the columns of a 40 minutes game take a few MB (see columnar.py).
+    """
+
+    def __init__(self, game_urn: str, start_time: str | None, stats: dict[str, dict], columns: ColumnarGame) -> None:
+        self.game_urn = game_urn
+        self.start_time = start_time
+        self.stats = stats
+        self.columns = columns
+
+
+def parse_game(source: Path, cache_dir: Path | None = None, cache_bytes: int | None = None, strict: bool = True) -> ServedGame:
+    """Parse a game in a worker process, only its stats and columns are sent back to the server."""
+    bp = worker_parser(source, cache_dir, cache_bytes, strict)
+    stats = {team_urn: results.model_dump() for team_urn, results in bp.get_teams_stats().items()}
+    return ServedGame(bp.urn, bp.start_time, stats, bp.columns)
+
+
+class GameLRU:
+    """Parsed games, least recently used ones are evicted when their arrays take more than max_bytes.
+    The last added game is always kept, even if it is bigger than max_bytes.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.evictions = 0
+        self._games: OrderedDict[str, ServedGame] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def get(self, key: str) -> ServedGame | None:
+        game = self._games.get(key)
+        if game is not None:
+            self._games.move_to_end(key)
+        return game
+
+    def put(self, key: str, game: ServedGame) -> None:
+        if key in self._games:
+            self.nbytes -= self._games.pop(key).columns.nbytes
+        self._games[key] = game
+        self.nbytes += game.columns.nbytes
+        while self.nbytes > self.max_bytes and len(self._games) > 1:
+            _, evicted = self._games.popitem(last=False)
+            self.nbytes -= evicted.columns.nbytes
+            self.evictions += 1
+
+
+class RouteStats:
+    """Request count, errors and latencies of a route."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._recent: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, seconds: float, error: bool) -> None:
+        self.requests += 1
+        self.errors += error
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self._recent.append(seconds)
+
+    def to_dict(self) -> dict:
+        p50, p95, p99 = np.percentile(self._recent, [50, 95, 99]).tolist() if self._recent else (None, None, None)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "mean_seconds": self.total_seconds / self.requests if self.requests else None,
+            "max_seconds": self.max_seconds,
+            "p50_seconds": p50,
+            "p95_seconds": p95,
+            "p99_seconds": p99,
+        }
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _nullable(values: np.ndarray, mask: np.ndarray | None = None) -> list:
+    """Array as (nested) lists, NaN or masked out values as None (JSON null)."""
+    if mask is None and values.dtype.kind != "f":
+        return values.tolist()
+    missing = np.isnan(values) if mask is None else ~mask
+    values = values.astype(object)
+    values[missing] = None
+    return values.tolist()
+
+
+class GameServer:
+    """Local HTTP server of teams stats, time series and position frames of Bayes game folders, as JSON.
+
+    Games are parsed in a pool of worker processes, so that the event loop keeps serving requests,
+    and kept in a memory-bounded LRU cache keyed by the folder fingerprint (a modified folder is parsed again).
+    Concurrent requests of a game being parsed wait for the same parse.
+
+    Routes (path is relative to root) :
+        GET /stats?path=<game>
+        GET /series?path=<game>&metric=gold&metric=xp&step=60&diff=1
+        GET /positions?path=<game>&start=0&end=600&stride=1
+        GET /metrics  Cache hits, misses, merged requests, parse and request latencies.
+
+    Example:
+        server = GameServer(Path("dumps"), max_bytes=512 * 1024 ** 2)
+        asyncio.run(server.serve("127.0.0.1", 8000))
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        max_bytes: int = 1024 ** 3,
+        workers: int | None = None,
+        strict: bool = True,
+        cache: GameCache | None = None,
+        executor: Executor | None = None,
+    ) -> None:
+        """
+        Args:
+            root (Path): Folder the requested game paths are relative to, paths outside of it are refused.
+            max_bytes (int, optional): Memory of the parsed games kept in memory. Defaults to 1GB.
+            workers (int, optional): Number of parsing processes. Defaults to the CPU count.
+            strict (bool, optional): Parse games with validated models, see BayesParser. Defaults to True.
+            cache (GameCache, optional): On-disk cache of parsed games shared by the workers. Defaults to None.
+            executor (Executor, optional): Pool parsing games, instead of a pool of workers processes.
+            Defaults to None.
+        """
+        self.root = Path(root).resolve()
+        self.strict = strict
+        self.cache = cache
+        self.games = GameLRU(max_bytes)
+        self.workers = workers
+        self.executor = executor if executor is not None else self._new_executor()
+        self.hits = 0
+        self.misses = 0
+        self.merged = 0
+        self.parse_errors = 0
+        self.parse_latency = RouteStats()
+        self.routes = {
+            "/stats": self.stats,
+            "/series": self.series,
+            "/positions": self.positions,
+            "/metrics": self.metrics,
+        }
+        self.latency = {route: RouteStats() for route in self.routes}
+        # Parses in progress, by game key
+        self._parsing: dict[str, asyncio.Task] = dict()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # Workers are spawned, forking the threads of a running server can deadlock them
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"))
+
+    def resolve(self, path: str | None) -> Path:
+        """Game source of a requested path."""
+        if not path:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Missing path parameter")
+        source = (self.root / path).resolve()
+        if source != self.root and self.root not in source.parents:
+            raise HTTPError(HTTPStatus.FORBIDDEN, f"{path} is outside of the served folder")
+        if not source.exists():
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"No game at {path}")
+        return source
+
+    async def get_game(self, source: Path) -> ServedGame:
+        """Parsed game of source, from the cache, from a parse in progress, or parsed by a worker."""
+        # Stats every file of the folder (tens of ms for thousands of files), off the event loop
+        key = await asyncio.to_thread(fingerprint, source)
+        game = self.games.get(key)
+        if game is not None:
+            self.hits += 1
+            return game
+        future = self._parsing.get(key)
+        if future is not None:
+            self.merged += 1
+            return await asyncio.shield(future)
+
+        self.misses += 1
+        task = asyncio.create_task(self._parse(key, source))
+        self._parsing[key] = task
+        # Shielded, a cancelled request must not cancel the parse other requests wait for
+        return await asyncio.shield(task)
+
+    async def _parse(self, key: str, source: Path) -> ServedGame:
+        loop = asyncio.get_running_loop()
+        cache_dir, cache_bytes = (self.cache.directory, self.cache.max_bytes) if self.cache is not None else (None, None)
+        start = time.perf_counter()
+        executor = self.executor
+        try:
+            game = await loop.run_in_executor(executor, parse_game, source, cache_dir, cache_bytes, self.strict)
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool) and self.executor is executor:
+                # A worker died (killed, out of memory), the pool refuses any new parse until it is replaced.
+                # Parses that were running with it fail too, only the first one replaces it
+                self.executor = self._new_executor()
+                executor.shutdown(wait=False, cancel_futures=True)
+            self.parse_errors += 1
+            self.parse_latency.record(time.perf_counter() - start, error=True)
+            raise
+        finally:
+            self._parsing.pop(key, None)
+        self.parse_latency.record(time.perf_counter() - start, error=False)
+        self.games.put(key, game)
+        return game
+
+    async def stats(self, query: dict[str, list[str]]) -> dict:
+        game = await self.get_game(self.resolve(_param(query, "path")))
+        return {"game_urn": game.game_urn, "start_time": game.start_time, "teams": game.stats}
+
+    async def series(self, query: dict[str, list[str]]) -> dict:
+        game = await self.get_game(self.resolve(_param(query, "path")))
+        metrics = query.get("metric") or [*TEAM_METRICS, *PLAYER_METRICS]
+        unknown = [m for m in metrics if m not in TEAM_METRICS and m not in PLAYER_METRICS]
+        if unknown:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Unknown metrics {unknown}, expected some of {[*TEAM_METRICS, *PLAYER_METRICS]}")
+        step = _int_param(query, "step", 60)
+        if step <= 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "step must be positive")
+        diff = _param(query, "diff", "0") not in ("0", "false", "")
+        series = GameSeries(game.columns, step=step)
+        # Values by metric, then team urn
+        values = {
+            metric: dict(zip(game.columns.team_urns, _nullable((series.diff(metric) if diff else series.team(metric)).T)))
+            for metric in metrics
+        }
+        return {"game_urn": game.game_urn, "step": step, "diff": diff, "game_time": series.grid.tolist(), "metrics": values}
+
+    async def positions(self, query: dict[str, list[str]]) -> dict:
+        game = await self.get_game(self.resolve(_param(query, "path")))
+        columns = game.columns
+        start, end = _int_param(query, "start", None), _int_param(query, "end", None)
+        stride = _int_param(query, "stride", 1)
+        if stride <= 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "stride must be positive")
+        keep = columns.position_mask.any(axis=1)
+        if start is not None:
+            keep &= columns.times >= start
+        if end is not None:
+            keep &= columns.times <= end
+        rows = np.flatnonzero(keep)[::stride]
+        mask = columns.position_mask[rows]
+        return {
+            "game_urn": game.game_urn,
+            "players": [
+                {"urn": urn, "name": name, "team_urn": columns.team_urns[team] if team >= 0 else None}
+                for urn, name, team in zip(columns.player_urns, columns.player_names, columns.player_teams.tolist())
+            ],
+            "game_time": columns.times[rows].tolist(),
+            # (frame, player) coordinates, None when the position of the player was not logged
+            "x": _nullable(columns.players["x"][rows], mask),
+            "y": _nullable(columns.players["y"][rows], mask),
+        }
+
+    async def metrics(self, query: dict[str, list[str]]) -> dict:
+        return {
+            "cache": {
+                "hits": self.hits,
+                "misses": self.misses,
+                "merged": self.merged,
+                "parse_errors": self.parse_errors,
+                "evictions": self.games.evictions,
+                "games": len(self.games),
+                "bytes": self.games.nbytes,
+                "max_bytes": self.games.max_bytes,
+                "parsing": len(self._parsing),
+            },
+            "parse": self.parse_latency.to_dict(),
+            "routes": {route: stats.to_dict() for route, stats in self.latency.items()},
+        }
+
+    async def handle(self, method: str, target: str) -> tuple[HTTPStatus, dict]:
+        """Response status and JSON body of a request."""
+        url = urlsplit(target)
+        route = self.routes.get(url.path)
+        if route is None:
+            return HTTPStatus.NOT_FOUND, {"error": f"Unknown route {url.path}, expected one of {list(self.routes)}"}
+        start = time.perf_counter()
+        status, body = HTTPStatus.OK, None
+        try:
+            if method != "GET":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} is not supported, use GET")
+            body = await route(parse_qs(url.query))
+        except HTTPError as e:
+            status, body = e.status, {"error": str(e)}
+        except Exception as e:
+            # Parse errors of a game, the server keeps running
+            status, body = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"}
+        self.latency[url.path].record(time.perf_counter() - start, error=status != HTTPStatus.OK)
+        return status, body
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one request per connection (Connection: close)."""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            method, target, _ = head.split(b"\r\n", 1)[0].decode("latin-1").split(" ", 2)
+            status, body = await self.handle(method, target)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            status, body = HTTPStatus.BAD_REQUEST, {"error": "Malformed request"}
+        try:
+            payload = json.dumps(body).encode()
+            writer.write(
+                f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode()
+                + payload
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8000) -> asyncio.Server:
+        """Start listening, port 0 picks a free port (see server.sockets)."""
+        return await asyncio.start_server(self._connection, host, port, limit=MAX_HEAD_BYTES)
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8000) -> None:
+        server = await self.start(host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self.executor.shutdown(cancel_futures=True)
+
+
+def _param(query: dict[str, list[str]], name: str, default: str | None = None) -> str | None:
+    values = query.get(name)
+    return values[-1] if values else default
+
+
+def _int_param(query: dict[str, list[str]], name: str, default: int | None) -> int | None:
+    value = _param(query, name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} must be an integer, got {value}")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Serve teams stats, time series and positions of Bayes games as JSON")
+    parser.add_argument("-r", "--root", type=str, default=".", help="Folder of the served games, request paths are relative to it")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument("-j", "--processes", type=int, default=None, help="Number of games parsed in parallel")
+    parser.add_argument("-m", "--memory", type=int, default=1024, help="Maximum memory of the games kept parsed, in MB")
+    parser.add_argument("--cache", action="store_true", help="Also cache parsed games on disk, see bayes.py --cache")
+    parser.add_argument("--cache-dir", type=str, default=str(DEFAULT_CACHE_DIR), help="Directory of the parsed games cache")
+    parser.add_argument("--cache-size", type=int, default=2048, help="Maximum size of the disk cache in MB")
+    parser.add_argument("--fast", action="store_true", help="Skip validation of most frames (trusted mode, see trusted.py)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    cache = GameCache(Path(args.cache_dir), max_bytes=args.cache_size * 1024 ** 2) if args.cache else None
+    server = GameServer(
+        Path(args.root), max_bytes=args.memory * 1024 ** 2, workers=args.processes, strict=not args.fast, cache=cache
+    )
+    print(f"Serving {server.root} on http://{args.host}:{args.port}", flush=True)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
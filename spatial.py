@@ -0,0 +1,249 @@
+from pathlib import Path
+from typing import Iterable
+import numpy as np
+import pandas as pd
+from PIL import Image
+from columnar import ColumnarGame
+from render import MAP_IMAGE, MAP_RANGE
+
+# Riot lists the participants of a team in role order
+ROLES = ("top", "jungle", "mid", "bot", "support")
+# Heatmap color ramp, from cold to hot (RGB)
+HEAT_COLORS = np.array([[0, 0, 255], [0, 255, 255], [0, 255, 0], [255, 255, 0], [255, 0, 0]], dtype=np.float32)
+
+
+class SpatialIndex:
+    """Player positions of one or many games, bucketed by time slice and map grid cell.
+
+    Samples are sorted by (time slice, cell x, cell y), so the samples of a time window and a
+    region are a few contiguous ranges found by binary search, whatever the number of games.
+    Heatmaps and region queries are NumPy operations on flat sample arrays.
+
+    Example:
+        index = SpatialIndex(columns for columns in season)
+        index.radius(9800, 4400, 2000, start=1170, end=1170)  # Near the dragon pit at 19:30
+        render_heatmap(index.heatmap(end=8 * 60, role="jungle"), "jungle.png")
+    """
+
+    def __init__(self, games: Iterable[ColumnarGame], cell_size: int = 1000, slice_seconds: int = 60) -> None:
+        """
+        Args:
+            games (Iterable[ColumnarGame]): Columns of the games to index.
+            cell_size (int, optional): Width of grid cells, in game units. Defaults to 1000.
+            slice_seconds (int, optional): Duration of time slices, in seconds. Defaults to 60.
+        """
+        self.cell_size = cell_size
+        self.slice_seconds = slice_seconds
+        self.n_cells = -(-(MAP_RANGE[1] - MAP_RANGE[0]) // cell_size)
+
+        # Players of all games, samples refer to them by global id
+        self.game_urns: list[str] = []
+        player_games, player_urns, player_names, player_teams, team_urns, player_roles = [], [], [], [], [], []
+        times, players, xs, ys = [], [], [], []
+        for g, columns in enumerate(games):
+            self.game_urns.append(columns.game_urn)
+            offset = len(player_urns)
+            player_games += [g] * len(columns.player_urns)
+            player_urns += columns.player_urns
+            player_names += columns.player_names
+            player_teams += columns.player_teams.tolist()
+            team_urns += [columns.team_urns[t] if t >= 0 else None for t in columns.player_teams]
+            # Role is the rank of the player in its team
+            player_roles += [
+                int(np.count_nonzero(columns.player_teams[:p] == t)) if t >= 0 else -1
+                for p, t in enumerate(columns.player_teams)
+            ]
+
+            t_idx, p_idx = np.nonzero(columns.position_mask)
+            times.append(columns.times[t_idx])
+            players.append((p_idx + offset).astype(np.int32))
+            xs.append(columns.players["x"][t_idx, p_idx])
+            ys.append(columns.players["y"][t_idx, p_idx])
+
+        self.player_games = np.array(player_games, dtype=np.int32)
+        self.player_urns = player_urns
+        self.player_names = player_names
+        self.player_teams = np.array(player_teams, dtype=np.int8)
+        self.player_team_urns = team_urns
+        self.player_roles = np.array(player_roles, dtype=np.int8)
+
+        times = np.concatenate(times) if times else np.empty(0, dtype=np.int32)
+        players = np.concatenate(players) if players else np.empty(0, dtype=np.int32)
+        xs = np.concatenate(xs) if xs else np.empty(0, dtype=np.int32)
+        ys = np.concatenate(ys) if ys else np.empty(0, dtype=np.int32)
+
+        # Sort samples by bucket once
+        keys = self._keys(times // slice_seconds, self._cell(xs), self._cell(ys))
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.times = times[order]
+        self.players = players[order]
+        self.x = xs[order]
+        self.y = ys[order]
+
+    def _cell(self, coordinates: np.ndarray) -> np.ndarray:
+        return np.clip((coordinates - MAP_RANGE[0]) // self.cell_size, 0, self.n_cells - 1)
+
+    def _keys(self, slices: np.ndarray, cx: np.ndarray, cy: np.ndarray) -> np.ndarray:
+        return (slices.astype(np.int64) * self.n_cells + cx) * self.n_cells + cy
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _candidates(self, x0: float, y0: float, x1: float, y1: float, start: int | None, end: int | None) -> np.ndarray:
+        """Indices of samples in the buckets overlapping the rectangle and the time window."""
+        if len(self.keys) == 0:
+            return np.empty(0, dtype=np.int64)
+        s0 = 0 if start is None else max(start, 0) // self.slice_seconds
+        s1 = int(self.times.max()) // self.slice_seconds if end is None else end // self.slice_seconds
+        cx0, cx1 = self._cell(np.array([x0, x1], dtype=np.int64))
+        cy0, cy1 = self._cell(np.array([y0, y1], dtype=np.int64))
+        if s1 < s0:
+            return np.empty(0, dtype=np.int64)
+
+        # One contiguous range of samples per (slice, cell x)
+        slices, cells = np.meshgrid(np.arange(s0, s1 + 1), np.arange(cx0, cx1 + 1), indexing="ij")
+        lo = np.searchsorted(self.keys, self._keys(slices, cells, cy0).ravel(), side="left")
+        hi = np.searchsorted(self.keys, self._keys(slices, cells, cy1).ravel(), side="right")
+        lengths = hi - lo
+        total = int(lengths.sum())
+        # Concatenate the ranges without a Python loop
+        starts = np.repeat(lo - np.cumsum(lengths) + lengths, lengths)
+        return starts + np.arange(total)
+
+    def _select(self, candidates: np.ndarray, keep: np.ndarray, start: int | None, end: int | None) -> np.ndarray:
+        if start is not None:
+            keep &= self.times[candidates] >= start
+        if end is not None:
+            keep &= self.times[candidates] <= end
+        return candidates[keep]
+
+    def rectangle(self, x0: float, y0: float, x1: float, y1: float, start: int | None = None, end: int | None = None) -> pd.DataFrame:
+        """Samples of players inside a rectangle of the map during a time window.
+
+        Args:
+            x0, y0, x1, y1 (float): Rectangle corners, in game units.
+            start (int, optional): Window start, in game seconds. Defaults to the beginning of games.
+            end (int, optional): Window end (included), in game seconds. Defaults to the end of games.
+
+        Returns:
+            pd.DataFrame: One row per sample, see samples.
+        """
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        candidates = self._candidates(x0, y0, x1, y1, start, end)
+        x, y = self.x[candidates], self.y[candidates]
+        keep = (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+        return self.samples(self._select(candidates, keep, start, end))
+
+    def radius(self, x: float, y: float, radius: float, start: int | None = None, end: int | None = None) -> pd.DataFrame:
+        """Samples of players within radius of a point of the map during a time window.
+        Same as rectangle, with a distance column.
+        """
+        candidates = self._candidates(x - radius, y - radius, x + radius, y + radius, start, end)
+        keep = np.hypot(self.x[candidates] - x, self.y[candidates] - y) <= radius
+        selected = self._ordered(self._select(candidates, keep, start, end))
+        df = self.samples(selected)
+        df["distance"] = np.hypot(self.x[selected] - x, self.y[selected] - y)
+        return df
+
+    def _ordered(self, indices: np.ndarray) -> np.ndarray:
+        players = self.players[indices]
+        return indices[np.lexsort((players, self.times[indices], self.player_games[players]))]
+
+    def samples(self, indices: np.ndarray) -> pd.DataFrame:
+        """Dataframe of samples, ordered by game, time and player : game_urn, game_time, player_urn,
+        player_name, team_urn, role, x and y columns.
+        """
+        indices = self._ordered(indices)
+        players = self.players[indices]
+        return pd.DataFrame({
+            "game_urn": np.array(self.game_urns, dtype=object)[self.player_games[players]],
+            "game_time": self.times[indices],
+            "player_urn": np.array(self.player_urns, dtype=object)[players],
+            "player_name": np.array(self.player_names, dtype=object)[players],
+            "team_urn": np.array(self.player_team_urns, dtype=object)[players],
+            "role": pd.Categorical.from_codes(self.player_roles[players], categories=ROLES),
+            "x": self.x[indices],
+            "y": self.y[indices],
+        })
+
+    def heatmap(
+        self,
+        start: int | None = None,
+        end: int | None = None,
+        team: str | int | None = None,
+        role: str | None = None,
+        player: str | None = None,
+        bins: int = 64,
+    ) -> np.ndarray:
+        """Occupancy histogram of the map : seconds spent by the selected players in each bin.
+
+        Args:
+            start (int, optional): Window start, in game seconds. Defaults to the beginning of games.
+            end (int, optional): Window end (included), in game seconds. Defaults to the end of games.
+            team (str | int, optional): Team urn, or side (0 for the first team of the announce). Defaults to all.
+            role (str, optional): One of ROLES. Defaults to all.
+            player (str, optional): Player urn. Defaults to all.
+            bins (int, optional): Number of bins on each axis. Defaults to 64.
+
+        Returns:
+            np.ndarray: Counts shaped (bins, bins), indexed [y bin, x bin] with y going up as in game coordinates.
+        """
+        keep = np.ones(len(self.keys), dtype=bool)
+        if start is not None:
+            keep &= self.times >= start
+        if end is not None:
+            keep &= self.times <= end
+        selected = np.ones(len(self.player_urns), dtype=bool)
+        if isinstance(team, int):
+            selected &= self.player_teams == team
+        elif team is not None:
+            selected &= np.array([urn == team for urn in self.player_team_urns], dtype=bool)
+        if role is not None:
+            selected &= self.player_roles == ROLES.index(role)
+        if player is not None:
+            selected &= np.array([urn == player for urn in self.player_urns], dtype=bool)
+        keep &= selected[self.players]
+        counts, _, _ = np.histogram2d(self.y[keep], self.x[keep], bins=bins, range=[MAP_RANGE, MAP_RANGE])
+        return counts
+
+
+def render_heatmap(
+    counts: np.ndarray,
+    path: Path | None = None,
+    size: int = 896,
+    opacity: float = 0.6,
+    background: Path = MAP_IMAGE,
+) -> Image.Image:
+    """Draw a heatmap (see SpatialIndex.heatmap) over the map image.
+
+    Args:
+        counts (np.ndarray): Occupancy histogram, indexed [y bin, x bin].
+        path (Path, optional): Image file to save. Defaults to None.
+        size (int, optional): Width and height of the image in pixels. Defaults to 896.
+        opacity (float, optional): Opacity of the hottest bins, empty bins are transparent. Defaults to 0.6.
+        background (Path, optional): Map image. Defaults to map_lol.png.
+
+    Returns:
+        Image.Image: RGB image.
+    """
+    # Log scale, a few bins (fountains) hold most of the time
+    heat = np.log1p(counts)
+    heat = heat / heat.max() if heat.max() > 0 else heat
+    # Image rows go down, game y goes up
+    heat = np.flipud(heat).astype(np.float32)
+    heat = np.asarray(Image.fromarray(heat, mode="F").resize((size, size), Image.Resampling.BILINEAR))
+
+    # Interpolate the color ramp
+    position = heat * (len(HEAT_COLORS) - 1)
+    low = np.clip(np.floor(position).astype(np.int32), 0, len(HEAT_COLORS) - 2)
+    fraction = (position - low)[..., None]
+    colors = HEAT_COLORS[low] * (1 - fraction) + HEAT_COLORS[low + 1] * fraction
+
+    base = np.asarray(Image.open(background).convert("RGB").resize((size, size), Image.Resampling.BILINEAR), dtype=np.float32)
+    alpha = (np.clip(heat, 0, 1) * opacity)[..., None]
+    image = Image.fromarray((base * (1 - alpha) + colors * alpha).astype(np.uint8))
+    if path is not None:
+        image.save(path)
+    return image
@@ -0,0 +1,283 @@
+"""
+Synthetic Bayes games, written with the same envelope and numbered files as the live feed,
+to benchmark the pipeline without shipping real dumps.
+"""
+import argparse
+import hashlib
+import json
+import random
+from pathlib import Path
+from event_store import Action
+
+# Games are told apart by a digest of their generating arguments, appended to this prefix
+GAME_URN_PREFIX = "live:lol:riot:game:synthetic"
+DRAGON_TYPES = ["fire", "water", "earth", "air"]
+# Actions logged between updates, they are indexed but not parsed into frames
+NOISE_ACTIONS = [Action.PLACED_WARD, Action.KILLED_WARD, Action.PURCHASED_ITEM, Action.LEVEL_UP, Action.CONSUMED_ITEM]
+DAMAGE_STATS = [
+    "totalDamageDealt", "physicalDamageDealtPlayer", "magicDamageDealtPlayer", "trueDamageDealtPlayer",
+    "totalDamageDealtChampions", "physicalDamageDealtChampions", "magicDamageDealtChampions",
+    "trueDamageDealtChampions", "totalDamageTaken", "physicalDamageTaken", "magicDamageTaken", "trueDamageTaken",
+    "totalDamageSelfMitigated", "totalTimeCrowdControlDealt", "totalHealOnTeammates", "totalTimeCCOthers",
+    "totalDamageShieldedOnTeammates", "totalDamageDealtToBuildings", "totalDamageDealtToTurrets",
+    "totalDamageDealtToObjectives",
+]
+
+
+def envelope(action: Action, payload: dict, urn: str) -> dict:
+    """Raw Bayes event, as BayesParser reads it : event["payload"]["payload"]["action"]."""
+    return {"payload": {"urn": urn, "payload": {"action": action.value, "payload": payload}}}
+
+
+class _Player:
+    """Running state of a player, serialized in UPDATE events."""
+
+    def __init__(self, urn: str, team: int, champion_id: int, rnd: random.Random) -> None:
+        self.urn = urn
+        self.team = team
+        self.champion_id = champion_id
+        self.rnd = rnd
+        # Start in the team fountain
+        self.x, self.y = (500, 500) if team == 0 else (14300, 14300)
+        self.gold = 500
+        self.kills = self.deaths = self.assists = 0
+        self.minions = 0
+        self.damage = 0.0
+
+    def move(self) -> None:
+        self.x = min(14800, max(0, self.x + self.rnd.randint(-400, 400)))
+        self.y = min(14800, max(0, self.y + self.rnd.randint(-400, 400)))
+
+    def earn(self, seconds: int) -> None:
+        self.gold += seconds * 2 + self.rnd.randint(0, 20 * seconds)
+        self.minions += self.rnd.randint(0, seconds)
+        self.damage += self.rnd.uniform(0, 300 * seconds)
+
+    def update(self, game_seconds: int) -> dict:
+        level = min(18, 1 + game_seconds // 100)
+        return {
+            "liveDataPlayerUrn": self.urn,
+            "position": [self.x, self.y],
+            "keystoneID": 8010,
+            "championID": self.champion_id,
+            "level": level,
+            "experience": game_seconds * 6,
+            "attackDamage": 60 + 4 * level,
+            "attackSpeed": 100 + level,
+            "alive": True,
+            "respawnTimer": 0.0,
+            "health": 550 + 90 * level,
+            "healthMax": 600 + 90 * level,
+            "healthRegen": 5,
+            "magicResist": 30 + level,
+            "magicPenetration": 0,
+            "magicPenetrationPercent": 0,
+            "magicPenetrationPercentBonus": 0,
+            "armor": 30 + 3 * level,
+            "armorPenetration": 0,
+            "armorPenetrationPercent": 0,
+            "armorPenetrationPercentBonus": 0,
+            "abilityPower": 10 * level,
+            "primaryAbilityResource": 300,
+            "primaryAbilityResourceRegen": 7,
+            "primaryAbilityResourceMax": 300 + 40 * level,
+            "currentGold": self.gold % 1500,
+            "totalGold": self.gold,
+            "goldPerSecond": 2,
+            "ccReduction": 0,
+            "cooldownReduction": 0,
+            "lifeSteal": 0,
+            "spellVamp": 0,
+            "items": [
+                {"itemID": 1055, "stackSize": 1, "purchaseGameTime": 0, "cooldownRemaining": 0.0},
+                {"itemID": 2003, "stackSize": 1, "purchaseGameTime": 0, "cooldownRemaining": 0.0},
+            ],
+            "itemsUndo": [],
+            "itemsSold": [],
+            "stats": {
+                "minionsKilled": self.minions,
+                "neutralMinionsKilled": 0.0,
+                "neutralMinionsKilledYourJungle": 0.0,
+                "neutralMinionsKilledEnemyJungle": 0.0,
+                "championsKilled": self.kills,
+                "numDeaths": self.deaths,
+                "assists": self.assists,
+                "perks": [{"perkID": 8010, "var1": 0, "var2": 0, "var3": 0}],
+                "wardPlaced": game_seconds // 90,
+                "wardKilled": game_seconds // 240,
+                "visionScore": game_seconds / 60,
+                **{stat: round(self.damage, 1) for stat in DAMAGE_STATS},
+            },
+            "spell1": {"name": "SummonerFlash", "cooldownRemaining": 0.0},
+            "spell2": {"name": "SummonerDot", "cooldownRemaining": 0.0},
+            "ultimate": {"name": "R", "cooldownRemaining": 0.0},
+        }
+
+
+def generate_events(
+    seconds: int = 1800,
+    stats_every: int = 5,
+    skip_rate: float = 0.02,
+    jitter_ms: int = 300,
+    noise_per_minute: int = 60,
+    seed: int = 0,
+    game_urn: str | None = None,
+) -> list[dict]:
+    """Events of a synthetic game, in feed order.
+
+    Args:
+        seconds (int, optional): Game length in seconds. Defaults to 1800.
+        stats_every (int, optional): Seconds between two UPDATE (stats) events. Defaults to 5.
+        skip_rate (float, optional): Probability that the position frame of a second is missing. Defaults to 0.02.
+        jitter_ms (int, optional): Maximum delay of an event gameTime after its second, in ms. Defaults to 300.
+        noise_per_minute (int, optional): Events per minute not parsed into frames (wards, items, ...). Defaults to 60.
+        seed (int, optional): Random seed, the same arguments always generate the same game. Defaults to 0.
+        game_urn (str, optional): Urn of the game. Defaults to GAME_URN_PREFIX and a digest of the other
+        arguments, so that different games are not mixed up (e.g. in a results store).
+
+    Returns:
+        list[dict]: Raw Bayes events.
+    """
+    if game_urn is None:
+        arguments = f"{seconds}:{stats_every}:{skip_rate}:{jitter_ms}:{noise_per_minute}:{seed}"
+        game_urn = f"{GAME_URN_PREFIX}:{hashlib.sha256(arguments.encode()).hexdigest()[:12]}"
+
+    def event(action: Action, payload: dict) -> dict:
+        return envelope(action, payload, game_urn)
+
+    rnd = random.Random(seed)
+    team_urns = ["live:lol:riot:team:blue", "live:lol:riot:team:red"]
+    players = [
+        _Player(f"live:lol:riot:player:{team}{i}", team, rnd.randint(1, 900), rnd)
+        for team in range(2) for i in range(5)
+    ]
+    team_stats = [
+        {"baronKills": 0, "dragonKills": 0, "inhibKills": 0, "towerKills": 0, "killedDragonTypes": []}
+        for _ in range(2)
+    ]
+
+    events = [event(Action.ANNOUNCE, {
+        "fixture": {"startTime": "2024-01-01T18:00:00Z"},
+        "teams": [
+            {
+                "urn": urn,
+                "participants": [
+                    {"urn": p.urn, "summonerName": f"Player {p.urn[-2:]}", "championId": p.champion_id}
+                    for p in players if p.team == team
+                ],
+            }
+            for team, urn in enumerate(team_urns)
+        ],
+    })]
+    first_blood = False
+
+    for second in range(1, seconds + 1):
+        game_time = second * 1000 + rnd.randint(0, jitter_ms)
+
+        def at(payload: dict) -> dict:
+            # Other events of the second are logged after its position frame
+            return {"gameTime": game_time + rnd.randint(0, max(0, 999 - jitter_ms)), **payload}
+
+        for p in players:
+            p.move()
+        if rnd.random() >= skip_rate:
+            events.append(event(Action.UPDATE_POSITIONS, {
+                "gameTime": game_time,
+                "positions": [{"playerUrn": p.urn, "position": [p.x, p.y]} for p in players],
+            }))
+
+        # Fights, objectives and noise, about as often as in a pro game
+        if second > 120 and rnd.random() < 1 / 60:
+            killer, victim = rnd.choice(players), rnd.choice(players)
+            if killer.team != victim.team:
+                killer.kills += 1
+                victim.deaths += 1
+                for p in rnd.sample([p for p in players if p.team == killer.team and p is not killer], 2):
+                    p.assists += 1
+                events.append(event(Action.KILL, at({"killerUrn": killer.urn, "victimUrn": victim.urn})))
+                if not first_blood:
+                    first_blood = True
+                    events.append(event(Action.SPECIAL_KILL, at(
+                        {"killType": "firstBlood", "killerUrn": killer.urn, "killerTeamUrn": team_urns[killer.team]}
+                    )))
+        if second >= 300 and second % 300 == 0:
+            team = rnd.randint(0, 1)
+            monster = "baron" if second >= 1200 else rnd.choice(["dragon", "dragon", "riftHerald"])
+            if monster == "dragon":
+                team_stats[team]["dragonKills"] += 1
+                team_stats[team]["killedDragonTypes"].append(rnd.choice(DRAGON_TYPES))
+            elif monster == "baron":
+                team_stats[team]["baronKills"] += 1
+            events.append(event(Action.KILLED_ANCIENT, at({"monsterType": monster, "killerTeamUrn": team_urns[team]})))
+        if second >= 240 and rnd.random() < 1 / 90:
+            team = rnd.randint(0, 1)
+            building = rnd.choice(["turretPlate", "turretPlate", "turret"] if second < 840 else ["turret", "inhibitor"])
+            if building == "turret":
+                team_stats[team]["towerKills"] += 1
+            elif building == "inhibitor":
+                team_stats[team]["inhibKills"] += 1
+            events.append(event(Action.TOOK_OBJECTIVE, at({"buildingType": building, "killerTeamUrn": team_urns[team]})))
+        for _ in range(noise_per_minute // 60 + (rnd.random() < (noise_per_minute % 60) / 60)):
+            events.append(event(rnd.choice(NOISE_ACTIONS), at({"playerUrn": rnd.choice(players).urn})))
+
+        if second % stats_every == 0:
+            for p in players:
+                p.earn(stats_every)
+            teams = {}
+            for team, key in enumerate(["teamOne", "teamTwo"]):
+                members = [p for p in players if p.team == team]
+                teams[key] = {
+                    "liveDataTeamUrn": team_urns[team],
+                    "assists": sum(p.assists for p in members),
+                    "championsKills": sum(p.kills for p in members),
+                    "deaths": sum(p.deaths for p in members),
+                    "totalGold": sum(p.gold for p in members),
+                    **team_stats[team],
+                    "killedDragonTypes": list(team_stats[team]["killedDragonTypes"]),
+                    "players": [p.update(second) for p in members],
+                }
+            events.append(event(Action.UPDATE, {"gameTime": game_time, **teams}))
+    return events
+
+
+def write_game(events: list[dict], directory: Path) -> None:
+    """Write events as a Bayes folder, one numbered file per event."""
+    directory.mkdir(parents=True, exist_ok=True)
+    for i, event in enumerate(events, 1):
+        with open(directory / f"{i:06d}.json", "w") as f:
+            json.dump(event, f, separators=(",", ":"))
+
+
+def generate_game(directory: Path, **kwargs) -> int:
+    """Write a synthetic game folder, kwargs are the arguments of generate_events. Returns the number of events."""
+    events = generate_events(**kwargs)
+    write_game(events, Path(directory))
+    return len(events)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Write a synthetic Bayes game folder")
+    parser.add_argument("-o", "--output", type=str, required=True, help="Game folder to write")
+    parser.add_argument("-m", "--minutes", type=float, default=30, help="Game length in minutes")
+    parser.add_argument("--stats-every", type=int, default=5, help="Seconds between two stats updates")
+    parser.add_argument("--skip-rate", type=float, default=0.02, help="Probability of a missing position frame")
+    parser.add_argument("--jitter", type=int, default=300, help="Maximum gameTime jitter in ms")
+    parser.add_argument("--noise", type=int, default=60, help="Events per minute not parsed into frames")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--urn", type=str, default=None, help="Game urn, defaults to a digest of the arguments")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    count = generate_game(
+        Path(args.output),
+        seconds=int(args.minutes * 60),
+        stats_every=args.stats_every,
+        skip_rate=args.skip_rate,
+        jitter_ms=args.jitter,
+        noise_per_minute=args.noise,
+        seed=args.seed,
+        game_urn=args.urn,
+    )
+    print(f"{count} events written in {args.output}")
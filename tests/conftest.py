@@ -0,0 +1,17 @@
+import sys
+from pathlib import Path
+import pytest
+
+# Modules live at the root of the repository
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from synthetic import generate_game  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def games(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Folder of two short synthetic games, a and b."""
+    root = tmp_path_factory.mktemp("games")
+    generate_game(root / "a", seconds=600, seed=1)
+    generate_game(root / "b", seconds=600, seed=2)
+    return root
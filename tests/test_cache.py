@@ -0,0 +1,36 @@
+import random
+from pathlib import Path
+from bayes_parser import BayesParser
+from cache import GameCache
+from event_store import Action
+from synthetic import generate_events, write_game
+
+
+def _dump(results: dict) -> dict:
+    return {urn: r.model_dump() for urn, r in results.items()}
+
+
+def test_cache_round_trip_keeps_logged_decimals(tmp_path: Path):
+    # Synthetic damage has 1 decimal, log 2 decimals values, most of them are not exact in float32
+    rnd = random.Random(0)
+    events = generate_events(seconds=600, seed=3)
+    for event in events:
+        message = event["payload"]["payload"]
+        if message["action"] == Action.UPDATE.value:
+            for team in ("teamOne", "teamTwo"):
+                for player in message["payload"][team]["players"]:
+                    player["stats"]["totalDamageDealtChampions"] = round(rnd.uniform(0, 400_000), 2)
+    events[-1]["payload"]["payload"]["payload"]["teamOne"]["players"][0]["stats"]["totalDamageDealtChampions"] = 337768.74
+    write_game(events, tmp_path / "game")
+
+    full = BayesParser(tmp_path / "game")
+    cache = GameCache(tmp_path / "cache")
+    cold = BayesParser(tmp_path / "game", cache=cache)
+    warm = BayesParser(tmp_path / "game", cache=cache)
+
+    assert warm._cached is not None
+    expected = _dump(full.get_players_stats())
+    assert 337768.74 in [results["damage_to_champions"] for results in expected.values()]
+    assert _dump(cold.get_players_stats()) == expected
+    assert _dump(warm.get_players_stats()) == expected
+    assert _dump(warm.get_teams_stats()) == _dump(full.get_teams_stats())
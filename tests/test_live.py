@@ -0,0 +1,42 @@
+import shutil
+from pathlib import Path
+import pytest
+from bayes_parser import BayesParser
+from live import LiveGame
+from loader import event_paths
+
+
+def _dump(results: dict) -> dict:
+    return {urn: r.model_dump() for urn, r in results.items()}
+
+
+@pytest.mark.parametrize("strict", [True, False])
+def test_polled_results_match_full_parse(games: Path, tmp_path: Path, strict: bool):
+    files = event_paths(games / "a")
+    live = LiveGame(tmp_path, strict=strict)
+    # Uneven batches, so that stats updates land before or after their position frame
+    start = 0
+    for size in [1, 3, 50, 7, 400, 1, 999]:
+        for path in files[start:start + size]:
+            shutil.copy(path, tmp_path)
+        start += size
+        live.poll()
+    while start < len(files):
+        for path in files[start:start + 333]:
+            shutil.copy(path, tmp_path)
+        start += 333
+        live.poll()
+
+    full = BayesParser(games / "a", strict=strict)
+    assert live.tail.count == len(files)
+    assert _dump(live.results) == _dump(full.get_teams_stats())
+    assert [f.game_time for f in live.parser.game.frames] == [f.game_time for f in full.game.frames]
+    assert _dump(live.parser.get_players_stats()) == _dump(full.get_players_stats())
+
+
+def test_follow_yields_final_results(games: Path):
+    live = LiveGame(games / "b", poll_interval=0)
+    updates = list(live.follow(idle_timeout=0.2))
+
+    assert len(updates) == 1
+    assert _dump(updates[-1]) == _dump(BayesParser(games / "b").get_teams_stats())
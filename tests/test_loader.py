@@ -0,0 +1,48 @@
+import tarfile
+import zipfile
+from pathlib import Path
+import pytest
+from bayes_parser import BayesParser
+from loader import EventLoader, event_paths, write_bundle
+
+
+@pytest.fixture(scope="module")
+def bundles(games: Path, tmp_path_factory: pytest.TempPathFactory) -> dict[str, Path]:
+    """Game a as a folder and as every supported bundle. Archive members are added out of order."""
+    folder = games / "a"
+    root = tmp_path_factory.mktemp("bundles")
+    paths = event_paths(folder)
+    shuffled = paths[1::2] + paths[::2]
+    with zipfile.ZipFile(root / "a.zip", "w") as archive:
+        for path in shuffled:
+            archive.write(path, f"a/{path.name}")
+    with tarfile.open(root / "a.tar.gz", "w:gz") as archive:
+        for path in shuffled:
+            archive.add(path, f"a/{path.name}")
+    events = EventLoader(workers=1).load(folder)
+    write_bundle(events, root / "a.jsonl")
+    write_bundle(events, root / "a.jsonl.gz")
+    return {"folder": folder, **{suffix: root / f"a.{suffix}" for suffix in ("zip", "tar.gz", "jsonl", "jsonl.gz")}}
+
+
+@pytest.mark.parametrize("kind", ["zip", "tar.gz", "jsonl", "jsonl.gz"])
+def test_bundles_load_the_events_of_the_folder(bundles: dict[str, Path], kind: str):
+    expected = EventLoader(workers=1).load(bundles["folder"])
+
+    assert EventLoader(workers=1).load(bundles[kind]) == expected
+    assert list(EventLoader(workers=1).iter_events(bundles[kind])) == expected
+    assert BayesParser(bundles[kind]).get_teams_stats() == BayesParser(bundles["folder"]).get_teams_stats()
+
+
+@pytest.mark.parametrize("workers, use_processes", [(4, False), (2, True)])
+def test_parallel_load_keeps_the_order(bundles: dict[str, Path], workers: int, use_processes: bool):
+    loader = EventLoader(workers=workers, use_processes=use_processes, chunk_size=64)
+
+    assert loader.load(bundles["folder"]) == EventLoader(workers=1).load(bundles["folder"])
+
+
+def test_unsupported_source(tmp_path: Path):
+    path = tmp_path / "game.rar"
+    path.write_bytes(b"")
+    with pytest.raises(ValueError):
+        EventLoader(workers=1).load(path)
@@ -0,0 +1,85 @@
+from collections import Counter
+from pathlib import Path
+import pytest
+from bayes_parser import BayesParser
+from event_store import Action
+from metrics import DEFAULT_METRICS, CountEvents, FirstEvent, Formula, ValueAt
+from synthetic import generate_events, write_game
+
+
+@pytest.fixture(scope="module")
+def game(tmp_path_factory: pytest.TempPathFactory) -> tuple[Path, list[dict]]:
+    """A 30 minutes synthetic game, with plates early and inhibitors late, and its raw events."""
+    path = tmp_path_factory.mktemp("games") / "long"
+    events = generate_events(seconds=1800, seed=5)
+    write_game(events, path)
+    return path, events
+
+
+def _objectives(events: list[dict], building: str) -> list[str]:
+    """Killer team of the TOOK_OBJECTIVE events of a building type, in game time order."""
+    payloads = [
+        e["payload"]["payload"]["payload"] for e in events
+        if e["payload"]["payload"]["action"] == Action.TOOK_OBJECTIVE.value
+    ]
+    return [p["killerTeamUrn"] for p in sorted(payloads, key=lambda p: p["gameTime"]) if p["buildingType"] == building]
+
+
+@pytest.mark.parametrize("strict", [True, False])
+def test_first_inhib_and_plates(game: tuple[Path, list[dict]], strict: bool):
+    path, events = game
+    inhibs, plates = _objectives(events, "inhibitor"), _objectives(events, "turretPlate")
+    assert inhibs and plates
+
+    stats = BayesParser(path, strict=strict).get_teams_stats()
+
+    assert [urn for urn, results in stats.items() if results.first_inhib] == [inhibs[0]]
+    assert {urn: results.plates for urn, results in stats.items()} == {urn: Counter(plates)[urn] for urn in stats}
+
+
+def test_registered_metrics(game: tuple[Path, list[dict]]):
+    path, events = game
+    bp = BayesParser(path)
+    metrics = DEFAULT_METRICS.copy()
+    metrics.register("first_plate", FirstEvent(action=Action.TOOK_OBJECTIVE, where={"buildingType": "turretPlate"}))
+    metrics.register("turrets", CountEvents(action=Action.TOOK_OBJECTIVE, where={"buildingType": "turret"}))
+    metrics.register("plates_per_turret", Formula(function=lambda v: v["plates"] / max(1, v["turrets"])))
+    metrics.register("xp_10", ValueAt(field="experience", minute=10), entity="player")
+    # Replaces a default metric, TeamResults is filled with it
+    metrics.register("gold_diff_10", ValueAt(field="total_gold", minute=11, diff=True), replace=True)
+
+    values = metrics.evaluate(bp.events, game=bp.game)
+    plates, turrets = Counter(_objectives(events, "turretPlate")), Counter(_objectives(events, "turret"))
+    for urn, team in values["team"].items():
+        assert team["first_plate"] == (urn == _objectives(events, "turretPlate")[0])
+        assert team["turrets"] == turrets[urn]
+        assert team["plates_per_turret"] == plates[urn] / max(1, turrets[urn])
+    frame = next(f for f in bp.game.frames if f.game_time >= 600 and f.teams)
+    assert {urn: player["xp_10"] for urn, player in values["player"].items()} == {p.urn: p.experience for p in frame.players}
+
+    teams = bp.get_teams_stats(metrics)
+    assert {urn: results.gold_diff_10 for urn, results in teams.items()} == {
+        urn: team["gold_diff_10"] for urn, team in values["team"].items()
+    }
+    assert teams != bp.get_teams_stats()
+
+    with pytest.raises(ValueError):
+        metrics.register("turrets", CountEvents(action=Action.KILL))
+    with pytest.raises(KeyError):
+        metrics.register("unknown", ValueAt(field="unknown"))
+
+
+@pytest.mark.parametrize("strict", [True, False])
+def test_frames_and_columns_give_the_same_values(game: tuple[Path, list[dict]], strict: bool):
+    bp = BayesParser(game[0], strict=strict)
+    metrics = DEFAULT_METRICS.copy()
+    metrics.register("xp_10", ValueAt(field="experience", minute=10), entity="player")
+    metrics.register("level_25", ValueAt(field="level", minute=25), entity="player")
+    metrics.register("towers_end", ValueAt(field="tower_kills", diff=True))
+
+    from_frames = metrics.evaluate(bp.events, game=bp.game)
+    from_columns = metrics.evaluate(bp.events, columns=bp.columns)
+
+    assert from_frames == from_columns
+    assert metrics.team_results(bp.events, game=bp.game) == metrics.team_results(bp.events, columns=bp.columns)
+    assert metrics.player_results(bp.events, game=bp.game) == metrics.player_results(bp.events, columns=bp.columns)
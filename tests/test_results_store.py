@@ -0,0 +1,46 @@
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from results_models import TeamResults
+from results_store import ResultsStore
+
+
+def _add(store: ResultsStore, game: str, start_time: str | None, **results) -> None:
+    store.add(f"game:{game}", "team:blue", start_time, TeamResults(**results))
+
+
+def test_weeks_start_on_monday(tmp_path: Path):
+    store = ResultsStore(tmp_path / "results.npz")
+    _add(store, "sunday", "2023-12-31T20:00:00Z", tower_kills=1)
+    _add(store, "monday", "2024-01-01T18:00:00Z", tower_kills=2)
+    _add(store, "next sunday", "2024-01-07T23:00:00Z", tower_kills=4)
+    _add(store, "next monday", "2024-01-08T10:00:00+02:00", tower_kills=8)
+
+    df = store.aggregate({"tower_kills": "sum"}, by="week")
+
+    assert df.index.tolist() == list(np.array(["2023-12-25", "2024-01-01", "2024-01-08"], dtype="datetime64[D]"))
+    assert df["tower_kills"].tolist() == [1, 6, 8]
+    assert df["games"].tolist() == [1, 2, 1]
+
+
+def test_adding_a_game_again_replaces_its_rows(tmp_path: Path):
+    path = tmp_path / "results.npz"
+    store = ResultsStore(path)
+    _add(store, "a", "2024-01-01T18:00:00Z", tower_kills=1)
+    _add(store, "b", None, tower_kills=2)
+    store.save()
+
+    store = ResultsStore(path)
+    _add(store, "a", "2024-01-02T18:00:00Z", tower_kills=3)
+    _add(store, "a", "2024-01-02T18:00:00Z", tower_kills=5)
+    store.save()
+    store.save()
+
+    store = ResultsStore(path)
+    assert len(store) == 2
+    df = store.dataframe().set_index("game_urn")
+    assert df.loc["game:a", "tower_kills"] == 5
+    assert df.loc["game:a", "start_time"] == np.datetime64("2024-01-02T18:00:00")
+    assert pd.isna(df.loc["game:b", "start_time"])
+    assert store.dataframe(store.select(start="2024-01-02"))["game_urn"].tolist() == ["game:a"]
+    assert store.aggregate({"tower_kills": "sum"}, by=None)["tower_kills"].tolist() == [7]
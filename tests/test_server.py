@@ -0,0 +1,112 @@
+import asyncio
+import json
+import os
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+import pytest
+from bayes_parser import BayesParser
+from server import GameServer
+
+
+async def _get(port: int, target: str) -> tuple[int, dict]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, body = response.split(b"\r\n\r\n", 1)
+    return int(head.split()[1]), json.loads(body)
+
+
+def _serve(server: GameServer, scenario):
+    """Run scenario(get) against server listening on a free port, get(target) returns (status, body)."""
+
+    async def main():
+        listener = await server.start(port=0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            return await scenario(lambda target: _get(port, target))
+        finally:
+            listener.close()
+            await listener.wait_closed()
+
+    try:
+        return asyncio.run(main())
+    finally:
+        server.close()
+
+
+def test_concurrent_requests_share_one_parse(games: Path):
+    async def scenario(get):
+        responses = await asyncio.gather(*(get("/stats?path=a") for _ in range(5)))
+        metrics = (await get("/metrics"))[1]
+        again = await get("/stats?path=a")
+        return responses, metrics, again, (await get("/metrics"))[1]
+
+    responses, metrics, again, metrics_after = _serve(GameServer(games, workers=1), scenario)
+
+    assert {status for status, _ in responses} == {200}
+    assert all(body == responses[0][1] for _, body in responses)
+    expected = {urn: results.model_dump() for urn, results in BayesParser(games / "a").get_teams_stats().items()}
+    assert responses[0][1]["teams"] == json.loads(json.dumps(expected))
+    assert metrics["cache"] | {"bytes": 0} == {
+        "hits": 0, "misses": 1, "merged": 4, "parse_errors": 0, "evictions": 0,
+        "games": 1, "bytes": 0, "max_bytes": 1024 ** 3, "parsing": 0,
+    }
+    assert metrics["parse"]["requests"] == 1
+    assert metrics["routes"]["/stats"]["requests"] == 5
+
+    assert again == responses[0]
+    assert metrics_after["cache"]["hits"] == 1
+    assert metrics_after["cache"]["misses"] == 1
+
+
+def test_least_recently_used_games_are_evicted(games: Path):
+    async def scenario(get):
+        statuses = [(await get(f"/stats?path={path}"))[0] for path in ["a", "b", "b", "a"]]
+        return statuses, (await get("/metrics"))[1]
+
+    # Smaller than a game, only the last parsed game is kept
+    statuses, metrics = _serve(GameServer(games, max_bytes=1, workers=1), scenario)
+
+    assert statuses == [200] * 4
+    cache = metrics["cache"]
+    assert (cache["hits"], cache["misses"], cache["evictions"], cache["games"]) == (1, 3, 2, 1)
+    assert metrics["parse"]["requests"] == 3
+
+
+@pytest.mark.parametrize("target, status", [
+    ("/stats", 400),
+    ("/series?path=a&metric=unknown", 400),
+    ("/series?path=a&step=x", 400),
+    ("/positions?path=a&stride=0", 400),
+    ("/stats?path=../a", 403),
+    ("/stats?path=/etc", 403),
+    ("/stats?path=missing", 404),
+    ("/unknown", 404),
+])
+def test_errors(games: Path, target: str, status: int):
+    async def scenario(get):
+        return await get(target), (await get("/metrics"))[1]
+
+    (got, body), metrics = _serve(GameServer(games, workers=1), scenario)
+
+    assert got == status
+    assert "error" in body
+    if target != "/unknown":
+        assert metrics["routes"][target.split("?")[0]]["errors"] == 1
+
+
+def test_broken_pool_is_replaced(games: Path):
+    server = GameServer(games, workers=1)
+    # Kill the worker, as the OOM killer would
+    with pytest.raises(BrokenProcessPool):
+        server.executor.submit(os._exit, 1).result()
+
+    async def scenario(get):
+        return [(await get("/stats?path=a"))[0] for _ in range(2)], (await get("/metrics"))[1]
+
+    statuses, metrics = _serve(server, scenario)
+
+    assert statuses == [500, 200]
+    assert metrics["cache"]["parse_errors"] == 1
@@ -0,0 +1,78 @@
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+from bayes_parser import BayesParser
+from render import MAP_RANGE
+from spatial import SpatialIndex
+
+
+@pytest.fixture(scope="module")
+def index(games: Path) -> SpatialIndex:
+    return SpatialIndex([BayesParser(games / name, strict=False).columns for name in ("a", "b")], cell_size=700, slice_seconds=45)
+
+
+@pytest.fixture(scope="module")
+def samples(games: Path) -> pd.DataFrame:
+    """Every position sample of the games, without the index."""
+    rows = []
+    for name in ("a", "b"):
+        columns = BayesParser(games / name, strict=False).columns
+        for t, p in zip(*np.nonzero(columns.position_mask)):
+            rows.append((columns.game_urn, int(columns.times[t]), columns.player_urns[p], columns.players["x"][t, p], columns.players["y"][t, p]))
+    return pd.DataFrame(rows, columns=["game_urn", "game_time", "player_urn", "x", "y"])
+
+
+def _keys(df: pd.DataFrame) -> list[tuple]:
+    return sorted(zip(df["game_urn"], df["game_time"], df["player_urn"], df["x"], df["y"]))
+
+
+@pytest.mark.parametrize("x0, y0, x1, y1, start, end", [
+    (3000, 3000, 9000, 8000, None, None),
+    (9000, 8000, 3000, 3000, 100, 130),  # Corners in any order
+    (0, 0, 14800, 14800, 44, 46),  # Window across a time slice boundary
+    (5000, 5000, 5000, 5000, 0, 600),
+    (3000, 3000, 9000, 8000, 200, 100),
+])
+def test_rectangle_matches_scan(index: SpatialIndex, samples: pd.DataFrame, x0, y0, x1, y1, start, end):
+    expected = samples[
+        samples["x"].between(min(x0, x1), max(x0, x1)) & samples["y"].between(min(y0, y1), max(y0, y1))
+        & (samples["game_time"] >= (start if start is not None else -1))
+        & (samples["game_time"] <= (end if end is not None else 10 ** 9))
+    ]
+    got = index.rectangle(x0, y0, x1, y1, start=start, end=end)
+    assert _keys(got) == _keys(expected)
+
+
+@pytest.mark.parametrize("x, y, radius, start, end", [(9800, 4400, 2000, None, None), (500, 500, 1500, 0, 90), (7400, 7400, 10, None, 300)])
+def test_radius_matches_scan(index: SpatialIndex, samples: pd.DataFrame, x, y, radius, start, end):
+    distance = np.hypot(samples["x"] - x, samples["y"] - y)
+    expected = samples[
+        (distance <= radius)
+        & (samples["game_time"] >= (start if start is not None else -1))
+        & (samples["game_time"] <= (end if end is not None else 10 ** 9))
+    ]
+    got = index.radius(x, y, radius, start=start, end=end)
+    assert _keys(got) == _keys(expected)
+    assert (got["distance"] <= radius).all()
+    # Ordered by game (in index order), then time
+    order = list(zip(got["game_urn"].map(index.game_urns.index), got["game_time"]))
+    assert order == sorted(order)
+
+
+def test_heatmap_counts_selected_samples(index: SpatialIndex, samples: pd.DataFrame):
+    heat = index.heatmap(bins=16)
+    assert heat.shape == (16, 16)
+    assert heat.sum() == len(samples)
+
+    window = index.heatmap(start=60, end=180, bins=16)
+    expected, _, _ = np.histogram2d(
+        *samples[samples["game_time"].between(60, 180)][["y", "x"]].to_numpy().T, bins=16, range=[MAP_RANGE, MAP_RANGE]
+    )
+    np.testing.assert_array_equal(window, expected)
+
+    jungle = index.heatmap(role="jungle", team=0)
+    # One jungler of the first team per game
+    assert jungle.sum() == samples["player_urn"].isin(["live:lol:riot:player:01"]).sum()
+    player = index.heatmap(player="live:lol:riot:player:13")
+    assert player.sum() == (samples["player_urn"] == "live:lol:riot:player:13").sum()
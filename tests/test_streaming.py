@@ -0,0 +1,87 @@
+from pathlib import Path
+import numpy as np
+import pytest
+from bayes_parser import BayesParser
+from cache import FRAME_ACTIONS, GameCache
+from event_store import Action
+from metrics import DEFAULT_METRICS, STATS_ACTIONS, CountEvents
+
+
+def _dump(results: dict) -> dict:
+    return {urn: r.model_dump() for urn, r in results.items()}
+
+
+def _assert_same_game(parser: BayesParser, full: BayesParser) -> None:
+    assert _dump(parser.get_teams_stats()) == _dump(full.get_teams_stats())
+    assert _dump(parser.get_players_stats()) == _dump(full.get_players_stats())
+    columns, expected = parser.columns, full.columns
+    np.testing.assert_array_equal(columns.times, expected.times)
+    np.testing.assert_array_equal(columns.position_mask, expected.position_mask)
+    np.testing.assert_array_equal(columns.stats_mask, expected.stats_mask)
+    for name, values in expected.players.items():
+        np.testing.assert_array_equal(columns.players[name], values, err_msg=name)
+    for name, values in expected.teams.items():
+        np.testing.assert_array_equal(columns.teams[name], values, err_msg=name)
+
+
+@pytest.mark.parametrize("strict", [True, False])
+def test_streaming_matches_full_parse(games: Path, strict: bool):
+    full = BayesParser(games / "a", strict=strict)
+    streamed = BayesParser(games / "a", strict=strict, streaming=True)
+
+    _assert_same_game(streamed, full)
+    assert len(streamed.game.frames) == len(full.game.frames)
+    kept = {e["payload"]["payload"]["action"] for e in streamed.data}
+    assert Action.ANNOUNCE.value in kept
+    assert kept <= {a.value for a in STATS_ACTIONS}
+
+
+def test_streaming_keeps_requested_actions(games: Path):
+    everything = BayesParser(games / "a", streaming=True, keep_actions=None)
+    stats_only = BayesParser(games / "a", streaming=True)
+
+    frame_actions = {a.value for a in FRAME_ACTIONS}
+    expected = [e for e in BayesParser(games / "a").data if e["payload"]["payload"]["action"] not in frame_actions]
+    assert everything.data == expected
+    assert len(stats_only.data) < len(everything.data)
+    assert _dump(everything.get_teams_stats()) == _dump(stats_only.get_teams_stats())
+
+
+def test_cached_streaming_parse_matches_full_parse(games: Path, tmp_path: Path):
+    cache = GameCache(tmp_path)
+    cold = BayesParser(games / "b", cache=cache, strict=False, streaming=True)
+    warm = BayesParser(games / "b", cache=cache, strict=False, streaming=True)
+
+    assert warm._cached is not None
+    full = BayesParser(games / "b", strict=False)
+    _assert_same_game(cold, full)
+    _assert_same_game(warm, full)
+
+
+def test_metrics_of_dropped_actions_raise(games: Path, tmp_path: Path):
+    metrics = DEFAULT_METRICS.copy()
+    metrics.register("wards", CountEvents(action=Action.PLACED_WARD, by="playerUrn"), entity="player")
+    full = BayesParser(games / "a")
+    expected = metrics.evaluate(full.events, game=full.game, entities=["player"])["player"]
+    assert sum(values["wards"] for values in expected.values()) > 0
+
+    streamed = BayesParser(games / "a", streaming=True)
+    assert Action.PLACED_WARD not in streamed.kept_actions
+    with pytest.raises(ValueError, match="PLACED_WARD"):
+        streamed.get_players_stats(metrics)
+    # Team metrics don't read wards
+    assert _dump(streamed.get_teams_stats(metrics)) == _dump(full.get_teams_stats())
+
+    cache = GameCache(tmp_path)
+    BayesParser(games / "a", cache=cache)
+    with pytest.raises(ValueError, match="PLACED_WARD"):
+        BayesParser(games / "a", cache=cache).get_players_stats(metrics)
+
+    # Kept on request, from the feed and from the cache
+    keep_actions = STATS_ACTIONS | metrics.actions
+    for parser in (
+        BayesParser(games / "a", streaming=True, keep_actions=keep_actions),
+        BayesParser(games / "a", cache=cache, keep_actions=keep_actions),
+        BayesParser(games / "a", cache=cache, keep_actions=keep_actions),
+    ):
+        assert metrics.evaluate(parser.events, columns=parser.columns, entities=["player"])["player"] == expected
@@ -0,0 +1,65 @@
+from pathlib import Path
+import numpy as np
+import pytest
+from bayes_parser import BayesParser
+from synthetic import generate_game
+from timeseries import GameSeries
+
+
+@pytest.fixture(scope="module")
+def parser(tmp_path_factory: pytest.TempPathFactory) -> BayesParser:
+    # Stats every 7 seconds, never logged on a minute mark
+    path = tmp_path_factory.mktemp("games") / "odd"
+    generate_game(path, seconds=1300, stats_every=7, seed=4)
+    return BayesParser(path, strict=False)
+
+
+def _reference(columns, values: np.ndarray, mask: np.ndarray, time: float, after: bool) -> np.ndarray:
+    """Value of each column at time, by scanning frames."""
+    frames = list(range(len(columns.times)))
+    frames = frames if after else frames[::-1]
+    result = []
+    for c in range(values.shape[1]):
+        logged = [i for i in frames if mask[i, c] and (columns.times[i] >= time if after else columns.times[i] <= time)]
+        if not logged and after:
+            # Past the last value, the final one
+            logged = [max(i for i in range(len(columns.times)) if mask[i, c])]
+        result.append(values[logged[0], c] if logged else np.nan)
+    return np.array(result)
+
+
+def test_fill_reads_last_value_at_or_before(parser: BayesParser):
+    columns = parser.columns
+    series = GameSeries(columns, step=60)
+    gold = series.team("gold")
+    xp = series.player("experience")
+
+    assert gold.shape == (len(series.grid), len(columns.team_urns))
+    assert np.isnan(gold[0]).all()
+    for i, time in enumerate(series.grid):
+        np.testing.assert_array_equal(gold[i], _reference(columns, columns.teams["total_gold"], columns.team_mask, time, after=False))
+        np.testing.assert_array_equal(xp[i], _reference(columns, columns.players["experience"], columns.stats_mask, time, after=False))
+
+
+def test_fill_reads_first_value_at_or_after(parser: BayesParser):
+    columns = parser.columns
+    series = GameSeries(columns)
+    times = np.array([0, 0.5, 61, 600, 1299.5, 5000])
+    gold = series.team("gold", times=times, after=True)
+
+    for i, time in enumerate(times):
+        np.testing.assert_array_equal(gold[i], _reference(columns, columns.teams["total_gold"], columns.team_mask, time, after=True))
+    # Past the end of the game, the final value
+    np.testing.assert_array_equal(gold[-1], series.team("gold")[-1])
+
+
+def test_checkpoints_match_team_results(parser: BayesParser):
+    series = GameSeries(parser.columns)
+    checkpoints = series.checkpoints("gold", [10, 15, 20, 60])
+    expected = np.array([
+        [parser.get_teams_stats()[urn].model_dump()[f"gold_diff_{minute}"] for urn in parser.columns.team_urns]
+        for minute in ("10", "15", "20", "end")
+    ])
+    np.testing.assert_array_equal(checkpoints, expected)
+    # Stats are not logged on minute marks, the last value before differs
+    assert not np.array_equal(series.checkpoints("gold", [10, 15, 20], after=False), checkpoints[:3])
@@ -0,0 +1,94 @@
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Callable, Iterable
+
+if TYPE_CHECKING:
+    from bayes_models import Frame
+
+
+class FrameTimeline:
+    """Game time index over frames ordered by game time.
+
+    Gives O(1) lookup of a frame by second, bisect lookup of the first frame at or after a time
+    (position frames sometimes skip a second), nearest frame snapping, and the slot of each
+    player urn in frame.players.
+    """
+
+    def __init__(self, frames: Iterable["Frame"] = ()) -> None:
+        self.frames: list["Frame"] = []
+        self.times: list[int] = []
+        self._by_second: dict[int, int] = {}
+        self._slots: list[dict[str, int]] = []
+        for frame in frames:
+            self.append(frame)
+
+    def append(self, frame: "Frame") -> None:
+        """Index a frame. Frames have to be appended in game time order."""
+        if self.times and frame.game_time < self.times[-1]:
+            raise ValueError(f"Frame at {frame.game_time}s appended after frame at {self.times[-1]}s")
+        idx = len(self.frames)
+        self.frames.append(frame)
+        self.times.append(frame.game_time)
+        # Keep the first frame of a second, as a linear search would
+        self._by_second.setdefault(frame.game_time, idx)
+
+        slots = {p.urn: i for i, p in enumerate(frame.players)}
+        if self._slots and self._slots[-1] == slots:
+            # Players are almost always logged in the same order, share the map between frames
+            slots = self._slots[-1]
+        self._slots.append(slots)
+
+    def sync(self, frames: list["Frame"]) -> "FrameTimeline":
+        """Index frames appended to the list since the last sync, rebuild if the list was modified otherwise."""
+        n = len(self.frames)
+        if len(frames) < n or (n > 0 and frames[n - 1] is not self.frames[-1]):
+            self.__init__(frames)
+        else:
+            for frame in frames[n:]:
+                self.append(frame)
+        return self
+
+    def index_at(self, game_time: int) -> int | None:
+        return self._by_second.get(game_time)
+
+    def at(self, game_time: int) -> "Frame | None":
+        """Frame logged at exactly game_time seconds."""
+        idx = self.index_at(game_time)
+        return self.frames[idx] if idx is not None else None
+
+    def index_at_or_after(self, game_time: int) -> int | None:
+        idx = bisect_left(self.times, game_time)
+        return idx if idx < len(self.frames) else None
+
+    def at_or_after(self, game_time: int) -> "Frame | None":
+        """First frame logged at or after game_time seconds."""
+        idx = self.index_at_or_after(game_time)
+        return self.frames[idx] if idx is not None else None
+
+    def index_nearest(self, game_time: int) -> int | None:
+        if not self.frames:
+            return None
+        idx = bisect_left(self.times, game_time)
+        if idx == len(self.frames):
+            return idx - 1
+        if idx > 0 and game_time - self.times[idx - 1] <= self.times[idx] - game_time:
+            return idx - 1
+        return idx
+
+    def nearest(self, game_time: int) -> "Frame | None":
+        """Frame logged the closest to game_time seconds, earlier frame on ties."""
+        idx = self.index_nearest(game_time)
+        return self.frames[idx] if idx is not None else None
+
+    def player_slots(self, idx: int) -> dict[str, int]:
+        """Map of player urn to its index in frames[idx].players."""
+        return self._slots[idx]
+
+    def filter(self, predicate: Callable[["Frame"], bool]) -> "FrameTimeline":
+        """New timeline over the frames matching predicate."""
+        return FrameTimeline(f for f in self.frames if predicate(f))
+
+    def last(self) -> "Frame | None":
+        return self.frames[-1] if self.frames else None
+
+    def __len__(self) -> int:
+        return len(self.frames)
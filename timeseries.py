@@ -0,0 +1,220 @@
+from typing import Iterable
+import numpy as np
+import pandas as pd
+from columnar import ColumnarGame
+
+# Team metrics read from team frames, and the TeamFrame field they come from
+TEAM_METRICS = {
+    "gold": "total_gold",
+    "kills": "champions_kills",
+    "deaths": "deaths",
+    "assists": "assists",
+    "dragons": "dragon_kills",
+    "barons": "baron_kills",
+    "towers": "tower_kills",
+    "inhibs": "inhib_kills",
+}
+# Team metrics summed over the players of the team
+PLAYER_METRICS = {
+    "xp": "experience",
+    "cs": "cs",
+}
+
+
+class GameSeries:
+    """Time series of a game, resampled on a regular grid of game times.
+
+    Stats are logged every 5 seconds and positions every second (with skipped seconds). Each grid time
+    takes the last value logged at or before it, values before the first update are NaN.
+    Everything is computed with NumPy indexing on the columns of the game, without looping over frames.
+    """
+
+    def __init__(self, columns: ColumnarGame, step: int = 1) -> None:
+        """
+        Args:
+            columns (ColumnarGame): Columns of the game.
+            step (int, optional): Seconds between two grid times, 60 for per-minute series. Defaults to 1.
+        """
+        self.columns = columns
+        self.step = step
+        end = int(columns.times[-1]) if len(columns.times) > 0 else -1
+        self.grid = np.arange(0, end + 1, step, dtype=np.int32)
+        # One-hot (player, team) matrix, to sum player series by team
+        n_teams = len(columns.team_urns)
+        self._membership = (columns.player_teams[:, None] == np.arange(n_teams)[None, :]).astype(np.float64)
+        self._cache: dict[tuple[str, str], np.ndarray] = dict()
+
+    def _last_logged(self, mask: np.ndarray) -> np.ndarray:
+        """(frame, column) index of the last frame at or before each frame where column was logged, -1 if none."""
+        last = np.where(mask, np.arange(len(mask))[:, None], -1)
+        np.maximum.accumulate(last, axis=0, out=last)
+        return last
+
+    def _next_logged(self, mask: np.ndarray) -> np.ndarray:
+        """(frame, column) index of the first frame at or after each frame where column was logged, -1 if none."""
+        n = len(mask)
+        following = np.where(mask, np.arange(n)[:, None], n)
+        following = np.minimum.accumulate(following[::-1], axis=0)[::-1]
+        following[following == n] = -1
+        return following
+
+    def _fill(self, values: np.ndarray, mask: np.ndarray, times: np.ndarray | None = None, after: bool = False) -> np.ndarray:
+        """Forward fill (frame, column) values logged where mask is set, read at times (defaults to the grid).
+        If after, each time takes the first value logged at or after it instead, or the last value of the game.
+        """
+        times = self.grid if times is None else times
+        filled = np.full((len(times), values.shape[1]), np.nan)
+        if len(values) == 0:
+            return filled
+        last = self._last_logged(mask)
+        if after:
+            # First frame at or after each time, past the last logged value it is the last one
+            rows = np.searchsorted(self.columns.times, times, side="left")
+            idx = self._next_logged(mask)[np.minimum(rows, len(mask) - 1)]
+            idx[rows >= len(mask)] = -1
+            idx = np.where(idx >= 0, idx, last[-1])
+        else:
+            # Last frame at or before each time
+            rows = np.searchsorted(self.columns.times, times, side="right") - 1
+            idx = last[np.maximum(rows, 0)]
+            idx[rows < 0] = -1
+        valid = idx >= 0
+        cols = np.broadcast_to(np.arange(values.shape[1]), idx.shape)
+        filled[valid] = values[idx[valid], cols[valid]]
+        return filled
+
+    def _player_values(self, field: str) -> tuple[np.ndarray, np.ndarray]:
+        if field == "cs":
+            return self.columns.cs, self.columns.stats_mask
+        if field in ("x", "y"):
+            return self.columns.players[field], self.columns.position_mask
+        return self.columns.players[field], self.columns.stats_mask
+
+    def player(self, field: str, times: np.ndarray | None = None, after: bool = False) -> np.ndarray:
+        """Series of a player field (PlayerFrame / StatsFrame field, "cs", "x" or "y"), shaped (time, player).
+
+        Args:
+            field (str): Player field.
+            times (np.ndarray, optional): Game times (s) to read. Defaults to the grid.
+            after (bool, optional): Read the first value logged at or after each time, instead of the last one
+            logged at or before it. Defaults to False.
+        """
+        if times is not None or after:
+            return self._fill(*self._player_values(field), times=None if times is None else np.asarray(times), after=after)
+        key = ("player", field)
+        if key not in self._cache:
+            self._cache[key] = self._fill(*self._player_values(field))
+        return self._cache[key]
+
+    def team(self, metric: str, times: np.ndarray | None = None, after: bool = False) -> np.ndarray:
+        """Series of a team metric (see TEAM_METRICS and PLAYER_METRICS), shaped (time, team).
+
+        Args:
+            metric (str): Metric name.
+            times (np.ndarray, optional): Game times (s) to read. Defaults to the grid.
+            after (bool, optional): Read the first value logged at or after each time, see player. Defaults to False.
+        """
+        key = ("team", metric)
+        cached = times is None and not after
+        if cached and key in self._cache:
+            return self._cache[key]
+        if metric in TEAM_METRICS:
+            series = self._fill(self.columns.teams[TEAM_METRICS[metric]], self.columns.team_mask, times=times, after=after)
+        elif metric in PLAYER_METRICS:
+            series = self.player(PLAYER_METRICS[metric], times=times, after=after) @ self._membership
+        else:
+            raise KeyError(f"Unknown team metric {metric}, expected one of {[*TEAM_METRICS, *PLAYER_METRICS]}")
+        if cached:
+            self._cache[key] = series
+        return series
+
+    def diff(self, metric: str, times: np.ndarray | None = None, after: bool = False) -> np.ndarray:
+        """Difference between each team and the other teams, shaped (time, team). Gold diff of diff("gold")."""
+        series = self.team(metric, times=times, after=after)
+        return 2 * series - series.sum(axis=1, keepdims=True)
+
+    def checkpoints(self, metric: str, minutes: Iterable[float], diff: bool = True, after: bool = True) -> np.ndarray:
+        """Values of a team metric at any list of game minutes, read in one call.
+        Checkpoints after the end of the game take the final value.
+
+        Args:
+            metric (str): Team metric, e.g. "gold".
+            minutes (Iterable[float]): Checkpoint times in minutes, e.g. [10, 15, 20].
+            diff (bool, optional): Return the difference with the other team. Defaults to True.
+            after (bool, optional): Read the first value logged at or after each checkpoint, the rule of
+            metrics.ValueAt (TeamResults gold_diff_15 is checkpoints("gold", [15])). If False, read the last value
+            logged at or before it, as the series grid does. Defaults to True.
+
+        Returns:
+            np.ndarray: Values shaped (checkpoint, team).
+        """
+        times = np.asarray(list(minutes), dtype=np.float64) * 60
+        return self.diff(metric, times=times, after=after) if diff else self.team(metric, times=times, after=after)
+
+    def team_dataframe(self, metrics: list[str] | None = None) -> pd.DataFrame:
+        """Long format dataframe, one row per (grid time, team), with metric and metric_diff columns."""
+        metrics = metrics or [*TEAM_METRICS, *PLAYER_METRICS]
+        n_times, n_teams = len(self.grid), len(self.columns.team_urns)
+        data = {
+            "game_time": np.repeat(self.grid, n_teams),
+            "team": pd.Categorical.from_codes(np.tile(np.arange(n_teams), n_times), categories=self.columns.team_urns),
+        }
+        for metric in metrics:
+            data[metric] = self.team(metric).reshape(-1)
+            data[f"{metric}_diff"] = self.diff(metric).reshape(-1)
+        return pd.DataFrame(data, copy=False)
+
+
+def league_series(games: Iterable[ColumnarGame], metric: str = "gold", diff: bool = True, step: int = 60) -> pd.DataFrame:
+    """Curves of a team metric over many games, e.g. league-wide gold diff curves.
+
+    Args:
+        games (Iterable[ColumnarGame]): Columns of the games (BayesParser.columns, or GameCache entries).
+        metric (str, optional): Team metric. Defaults to "gold".
+        diff (bool, optional): Difference with the other team. Defaults to True.
+        step (int, optional): Seconds between two points. Defaults to 60.
+
+    Returns:
+        pd.DataFrame: One row per (game_urn, team_urn), one column per game time (s).
+        Times after the end of a game are NaN, so that df.mean() is the league curve.
+    """
+    series, index = [], []
+    for columns in games:
+        game = GameSeries(columns, step=step)
+        values = game.diff(metric) if diff else game.team(metric)
+        series.append(values.T)
+        index += [(columns.game_urn, team_urn) for team_urn in columns.team_urns]
+    length = max((s.shape[1] for s in series), default=0)
+    table = np.full((len(index), length), np.nan)
+    row = 0
+    for values in series:
+        table[row:row + len(values), :values.shape[1]] = values
+        row += len(values)
+    return pd.DataFrame(
+        table,
+        index=pd.MultiIndex.from_tuples(index, names=["game_urn", "team_urn"]),
+        columns=pd.Index(np.arange(length) * step, name="game_time"),
+    )
+
+
+def league_checkpoints(
+    games: Iterable[ColumnarGame],
+    minutes: Iterable[float],
+    metric: str = "gold",
+    diff: bool = True,
+) -> pd.DataFrame:
+    """Values of a team metric at checkpoint minutes over many games.
+
+    Returns:
+        pd.DataFrame: One row per (game_urn, team_urn), one column per checkpoint minute.
+    """
+    minutes = list(minutes)
+    values, index = [], []
+    for columns in games:
+        values.append(GameSeries(columns).checkpoints(metric, minutes, diff=diff).T)
+        index += [(columns.game_urn, team_urn) for team_urn in columns.team_urns]
+    return pd.DataFrame(
+        np.concatenate(values) if values else np.empty((0, len(minutes))),
+        index=pd.MultiIndex.from_tuples(index, names=["game_urn", "team_urn"]),
+        columns=pd.Index(minutes, name="minute"),
+    )
@@ -0,0 +1,100 @@
+from dataclasses import field, make_dataclass
+from functools import cache
+from inspect import isclass
+from types import UnionType
+from typing import Any, Callable, Union, get_args, get_origin
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+
+_MISSING = object()
+
+
+@cache
+def record_type(model: type[BaseModel]) -> type:
+    """Lightweight __slots__ dataclass with the same fields (names and defaults) as model.
+
+    Records are several times cheaper to create than pydantic models, and are read the same way
+    (frame.players[0].stats.assists). They are not validated.
+    """
+    fields = []
+    for name, model_field in model.model_fields.items():
+        if model_field.default_factory is not None:
+            fields.append((name, Any, field(default_factory=model_field.default_factory)))
+        elif isinstance(model_field.default, (list, dict, set)):
+            # Mutable defaults are copied, as pydantic does
+            fields.append((name, Any, field(default_factory=model_field.default.copy)))
+        elif model_field.default is PydanticUndefined:
+            fields.append((name, Any))
+        else:
+            fields.append((name, Any, field(default=model_field.default)))
+    # Required fields first, as dataclasses need
+    fields.sort(key=lambda f: len(f) == 3)
+    return make_dataclass(f"{model.__name__}Record", fields, slots=True)
+
+
+def _converter(annotation) -> Callable[[Any], Any] | None:
+    """Function building nested records of a field from raw values, None if the field holds no model."""
+    origin = get_origin(annotation)
+    if origin in (Union, UnionType):
+        converters = [_converter(a) for a in get_args(annotation) if a is not type(None)]
+        return converters[0] if len(converters) == 1 else None
+    if origin is list:
+        item = _converter(get_args(annotation)[0])
+        return (lambda values: [item(v) for v in values]) if item is not None else None
+    if isclass(annotation) and issubclass(annotation, BaseModel):
+        return _constructor(annotation)
+    return None
+
+
+@cache
+def _constructor(model: type[BaseModel]) -> Callable[[dict], Any]:
+    """Generate the function building a record of model from a feed dict, as dataclasses do for __init__.
+    Reading each field with straight line code is much faster than looping over the fields.
+    """
+    record = record_type(model)
+    namespace = {"MISSING": _MISSING, "new": record.__new__, "record": record}
+    body = ["def construct(data):", "    get = data.get", "    r = new(record)"]
+    for i, (name, model_field) in enumerate(model.model_fields.items()):
+        if model_field.default_factory is not None:
+            namespace[f"default_{i}"] = model_field.default_factory
+            default = f"default_{i}()"
+        elif isinstance(model_field.default, (list, dict, set)):
+            namespace[f"default_{i}"] = model_field.default.copy
+            default = f"default_{i}()"
+        elif model_field.default is PydanticUndefined:
+            namespace[f"missing_{i}"] = f"Missing required field {model_field.alias or name} of {model.__name__}"
+            default = None
+        else:
+            namespace[f"default_{i}"] = model_field.default
+            default = f"default_{i}"
+
+        # Read by alias then by name
+        body.append(f"    v = get({(model_field.alias or name)!r}, MISSING)")
+        if model_field.alias:
+            body.append(f"    if v is MISSING: v = get({name!r}, MISSING)")
+        if default is None:
+            body.append(f"    if v is MISSING: raise KeyError(missing_{i})")
+        else:
+            body.append(f"    if v is MISSING: v = {default}")
+        convert = _converter(model_field.annotation)
+        if convert is not None:
+            namespace[f"convert_{i}"] = convert
+            body.append(f"    elif v is not None: v = convert_{i}(v)")
+        body.append(f"    r.{name} = v")
+    body.append("    return r")
+    exec("\n".join(body), namespace)
+    return namespace["construct"]
+
+
+def build(model: type[BaseModel], data: dict) -> Any:
+    """Build a record of model (see record_type), and records of its nested models, from a raw feed dict.
+
+    Fields are read by alias, then by name. There is NO validation nor type coercion,
+    data must already match the schema, e.g. checked by validating a sample of it.
+    """
+    return _constructor(model)(data)
+
+
+def make(model: type[BaseModel], **values) -> Any:
+    """Create a record of model from field names and already built values."""
+    return record_type(model)(**values)